@@ -10,6 +10,7 @@ from apps.analytics.api.serializers import TopCategorySerializer, TopCreatorSeri
     TopCreatorsQuery, TopEventQuery, TopEventSerializer
 from apps.events.api.serializers import PopularEventSerializer, EventSerializer
 from apps.events.models import Event, StudentEvent  # ajusta import al through real
+from apps.events.utils import cached_categories
 from apps.users.permissions import IsInAdministratorGroup
 
 
@@ -50,7 +51,7 @@ class TopCategoriesView(APIView):
         rows = (
             StudentEvent.objects
             .filter(event__in=ev)
-            .values("event__categories__id", "event__categories__type")
+            .values("event__categories__id")
             .annotate(
                 enrollments=Count("id"),
                 attendance=Count("id", filter=Q(attended=True)),
@@ -61,10 +62,12 @@ class TopCategoriesView(APIView):
         order_field = "-attendance" if by == "attendance" else "-enrollments"
         rows = rows.order_by(order_field)[:limit]
 
+        # Names come from the category catalogue: the query only joins the through table
+        categories = cached_categories()
         payload = [
             {
                 "category_id": r["event__categories__id"],
-                "category_name": r.get("event__categories__type"),
+                "category_name": getattr(categories.get(r["event__categories__id"]), "type", None),
                 "events": r["events"],
                 "enrollments": r["enrollments"],
                 "attendance": r["attendance"],
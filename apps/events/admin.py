@@ -7,6 +7,6 @@ class EventAdmin(admin.ModelAdmin):
     """
     Configuración del admin para el modelo Event
     """
-    list_display = ('id', 'place', 'start_date', 'start_time', 'end_date', 'end_time', 'id_creator', 'is_active', 'disabled_at')
+    list_display = ('id', 'place', 'start_date', 'start_time', 'end_date', 'end_time', 'timezone', 'id_creator', 'is_active', 'disabled_at')
     list_filter = ('start_date', 'is_active')
     
\ No newline at end of file
@@ -1,7 +1,12 @@
 from rest_framework import serializers
 from apps.events.models import Event, EventRating, EventComment, StudentEvent, Category, CommentReport, EventReport, NotificationPreference
-from apps.events.utils import compute_status
+from zoneinfo import ZoneInfo
+from apps.events.utils import cached_categories, compute_status, default_event_timezone, is_valid_timezone
 from apps.users.models import User
+from apps.media.api.fields import MediaImageField
+from apps.media.resolver import media_urls
+from apps.media.utils import delete_media_later, rendition_names, rendition_urls, schedule_renditions, thumbnail_url
+from django.conf import settings
 from django.utils import timezone
 from datetime import datetime, date
 
@@ -15,6 +20,24 @@ class CategorySerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
+class CategoryIdField(serializers.PrimaryKeyRelatedField):
+    """
+    Category primary key resolved from the in-process category catalogue
+    instead of one query per submitted id.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            category = cached_categories().get(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if category is None:
+            self.fail('does_not_exist', pk_value=data)
+        return category
+
+
 class EventCreatorSerializer(serializers.ModelSerializer):
     """
     Simplified serializer to display event creator information.
@@ -37,7 +60,7 @@ class EventSerializer(serializers.ModelSerializer):
     is_enrolled = serializers.BooleanField(read_only=True)
 
     categories = CategorySerializer(many=True, read_only=True)
-    categories_ids = serializers.PrimaryKeyRelatedField(
+    categories_ids = CategoryIdField(
         many=True,
         queryset=Category.objects.all(), 
         source='categories',
@@ -45,10 +68,15 @@ class EventSerializer(serializers.ModelSerializer):
         allow_empty=False
     )
 
+    cover_image = MediaImageField(required=False, allow_null=True)
+    cover_image_renditions = serializers.SerializerMethodField()
     is_finished = serializers.SerializerMethodField()
     is_ongoing = serializers.SerializerMethodField()
     is_upcoming = serializers.SerializerMethodField()
 
+    def get_cover_image_renditions(self, obj) -> dict:
+        return rendition_urls(obj.cover_image_renditions, self.context.get('request'))
+
     def get_is_finished(self, obj) -> bool:
         return compute_status(obj)[0]
 
@@ -61,12 +89,12 @@ class EventSerializer(serializers.ModelSerializer):
     class Meta:
         model = Event
         fields = [
-            'id', 'place', 'title', 'description', 'cover_image' ,'start_date', 'start_time', 'end_date',
-            'end_time', 'id_creator', 'disabled_by', 'disabled_at', 'is_active', 'max_capacity', 'participants_count', 'is_enrolled',
+            'id', 'place', 'title', 'description', 'cover_image', 'cover_image_renditions', 'start_date', 'start_time', 'end_date',
+            'end_time', 'timezone', 'starts_at', 'ends_at', 'id_creator', 'disabled_by', 'disabled_at', 'is_active', 'max_capacity', 'participants_count', 'is_enrolled',
             'categories', 'categories_ids', 'is_finished', 'is_ongoing', 'is_upcoming'
         ]
         read_only_fields = [
-            'id', 'id_creator', 'disabled_at', 'disabled_by', 'is_active',
+            'id', 'cover_image_renditions', 'starts_at', 'ends_at', 'id_creator', 'disabled_at', 'disabled_by', 'is_active',
             'participants_count', 'is_enrolled', 'categories', 'is_finished', 'is_ongoing', 'is_upcoming'
         ]
 
@@ -84,9 +112,10 @@ class EventSerializer(serializers.ModelSerializer):
         end_date = data.get('end_date')
         start_time = data.get('start_time')
         end_time = data.get('end_time')
+        tz = data.get('timezone') or getattr(self.instance, 'timezone', None) or default_event_timezone()
         
-        # Get current date and time
-        now = timezone.now()
+        # Get current date and time in the timezone of the event
+        now = timezone.localtime(timezone.now(), ZoneInfo(tz))
         today = now.date()
         current_time = now.time()
         
@@ -118,6 +147,28 @@ class EventSerializer(serializers.ModelSerializer):
         
         return data
 
+    def validate_timezone(self, value):
+        """
+        Validate that the timezone is a valid IANA name.
+        """
+        if not is_valid_timezone(value):
+            raise serializers.ValidationError('Zona horaria inválida.')
+        return value
+
+    def validate_cover_image(self, value):
+        """
+        Validate the size and format of the cover image.
+        """
+        if value is None:
+            return value
+        if value.size > settings.MEDIA_COVER_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'La imagen no puede superar {settings.MEDIA_COVER_MAX_SIZE // (1024 * 1024)} MB.'
+            )
+        if getattr(value, 'content_type', '') not in {'image/jpeg', 'image/png', 'image/webp'}:
+            raise serializers.ValidationError('Formatos permitidos: JPG, PNG, WEBP.')
+        return value
+
     def validate_categories_ids(self, value):
         """ 
         Validate that almost one category is selected.
@@ -132,7 +183,25 @@ class EventSerializer(serializers.ModelSerializer):
         """
         request = self.context.get('request')
         validated_data['id_creator'] = request.user
-        return super().create(validated_data)
+        event = super().create(validated_data)
+        schedule_renditions(event, 'cover_image', 'cover')
+        return event
+
+    def update(self, instance, validated_data):
+        """
+        Regenerates the cover renditions when the cover changes; the previous
+        cover is deleted after commit.
+        """
+        new_cover = 'cover_image' in validated_data
+        old_names = [instance.cover_image.name, *rendition_names(instance.cover_image_renditions)]
+        if new_cover:
+            validated_data['cover_image_renditions'] = {}
+        event = super().update(instance, validated_data)
+        if new_cover:
+            schedule_renditions(event, 'cover_image', 'cover')
+            if old_names[0] != event.cover_image.name:
+                delete_media_later(old_names)
+        return event
 
 
 class EventParticipantSerializer(serializers.ModelSerializer):
@@ -141,14 +210,18 @@ class EventParticipantSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(source='student.email', read_only=True)
     first_name = serializers.CharField(source='student.first_name', read_only=True)
     last_name = serializers.CharField(source='student.last_name', read_only=True)
-    profile_photo = serializers.CharField(source='student.profile_photo.url', read_only=True)
+    profile_photo = MediaImageField(source='student.profile_photo', read_only=True)
+    profile_photo_thumbnail = serializers.SerializerMethodField()
     attended = serializers.BooleanField(read_only=True)
 
     class Meta:
         model = User
-        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'profile_photo', 'attended']
+        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'profile_photo', 'profile_photo_thumbnail', 'attended']
         read_only_fields = fields
 
+    def get_profile_photo_thumbnail(self, obj) -> str | None:
+        return thumbnail_url(obj.student.profile_photo_renditions, self.context.get('request'))
+
 
 class EventCheckInSerializer(serializers.Serializer):
     """
@@ -180,20 +253,18 @@ class EventCommentSerializer(serializers.ModelSerializer):
     author = serializers.StringRelatedField(read_only=True) #mostrar nombre autor
     author_id = serializers.IntegerField(source='author.id', read_only=True)
     profile_photo = serializers.SerializerMethodField()
+    profile_photo_thumbnail = serializers.SerializerMethodField()
 
     class Meta: 
         model = EventComment
-        fields = ['id', 'event', 'author', 'author_id', 'profile_photo', 'content', 'created_at']
-        read_only_fields = ['id', 'event', 'author', 'author_id', 'profile_photo', 'created_at']
+        fields = ['id', 'event', 'author', 'author_id', 'profile_photo', 'profile_photo_thumbnail', 'content', 'created_at']
+        read_only_fields = ['id', 'event', 'author', 'author_id', 'profile_photo', 'profile_photo_thumbnail', 'created_at']
 
-    def get_profile_photo(self, obj) -> str | None:
-        photo = getattr(obj.author, 'profile_photo', None)
-        if not photo:
-            return None
+    def get_profile_photo_thumbnail(self, obj) -> str | None:
+        return thumbnail_url(obj.author.profile_photo_renditions, self.context.get('request'))
 
-        url = getattr(photo, 'url', None) or str(photo)
-        request = self.context.get('request')
-        return request.build_absolute_uri(url) if (request and url) else url
+    def get_profile_photo(self, obj) -> str | None:
+        return media_urls(self.context.get('request')).url(obj.author.profile_photo)
 
 class StudentEventSerializer(serializers.ModelSerializer):
     """
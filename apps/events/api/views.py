@@ -15,6 +15,7 @@ from datetime import datetime, timedelta
 from django.contrib.auth.models import Group
 
 from apps.events.api.filters import EventFilter
+from apps.events.tasks import sync_reminders
 from apps.events.models import Event, StudentEvent, EventRating, EventComment, Category, CommentReport, EventReport, NotificationPreference
 from apps.events.api.serializers import (
     EventSerializer, EventParticipantSerializer, EventCheckInSerializer,
@@ -24,10 +25,117 @@ from apps.events.api.serializers import (
     ReportedCommentSerializer, ReportCommentSerializer, EventReportSerializer,
     ReportedEventSerializer, ReportEventSerializer, NotificationPreferenceSerializer, EventRatingsAverageSerializer
 )
-from apps.notifications.models import Notification, UserNotification
+from apps.notifications.utils import notify_users
+from apps.users.permissions import ADMINISTRATOR_GROUP, is_admin
 
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema_view, extend_schema
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
+
+from apps.events.utils import cached_categories, categories_version, events_version, payload_etag, status_changed_at
+from apps.media.resolver import media_urls
+
+
+def _event_stamps(request, pk):
+    """
+    (updated_at, starts_at, ends_at) of the active event, read once per request.
+    """
+    if not hasattr(request, "_event_stamps"):
+        request._event_stamps = (
+            Event.objects.filter(pk=pk, is_active=True)
+            .values_list("updated_at", "starts_at", "ends_at")
+            .first()
+        )
+    return request._event_stamps
+
+
+def _categories_changed_at():
+    return datetime.fromtimestamp(categories_version(), tz=timezone.get_current_timezone())
+
+
+def event_etag(request, pk=None, **kwargs):
+    """
+    ETag of an event payload: its updated_at (enrollments, renditions and the
+    embedded creator and disabler included), its status, the categories
+    version and the user (is_enrolled).
+    """
+    stamps = _event_stamps(request, pk)
+    if stamps is None:
+        return None
+    updated_at, starts_at, ends_at = stamps
+    return payload_etag(
+        "event", pk, updated_at, status_changed_at(starts_at, ends_at),
+        categories_version(), request.user.pk, media_urls(request).stamp,
+    )
+
+
+def event_last_modified(request, pk=None, **kwargs):
+    stamps = _event_stamps(request, pk)
+    if stamps is None:
+        return None
+    updated_at, starts_at, ends_at = stamps
+    return max(filter(None, (updated_at, status_changed_at(starts_at, ends_at), _categories_changed_at())))
+
+
+def merge_enrollments(data, user):
+    """
+    Set is_enrolled in the events of a shared page for the user, with one
+    indexed query for the event ids of the page.
+    """
+    events = data["results"] if isinstance(data, dict) else data
+    ids = [event["id"] for event in events]
+    enrolled = set(
+        StudentEvent.objects.filter(student_id=user.pk, event_id__in=ids).values_list("event_id", flat=True)
+    ) if ids else set()
+    for event in events:
+        event["is_enrolled"] = event["id"] in enrolled
+
+
+def cache_shared_response(scope):
+    """
+    Serve GETs from a response cache shared by every user, per full URL. The
+    cached page has no per-user fields (is_enrolled is False, see
+    EventViewSet.is_shared); the enrollments of an authenticated user
+    are merged into it afterwards. The key holds the events and categories
+    versions, so any event write (or edit of a creator embedded in the
+    events, see touch_user_events) invalidates it; EVENTS_LIST_CACHE_TIMEOUT
+    bounds the staleness of the time-based fields.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(self, request, *args, **kwargs):
+            if not self.is_shared():
+                return view(self, request, *args, **kwargs)
+            key = "events:{}:{}".format(scope, payload_etag(
+                events_version(), categories_version(), media_urls(request).stamp, request.build_absolute_uri(),
+            ))
+            data = cache.get(key)
+            if data is not None:
+                response = Response(data)
+            else:
+                response = view(self, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                cache.set(key, response.data, settings.EVENTS_LIST_CACHE_TIMEOUT)
+            if request.user.is_authenticated:
+                merge_enrollments(response.data, request.user)
+            return response
+        return wrapper
+    return decorator
+
+
+def categories_etag(request, *args, **kwargs):
+    return payload_etag("categories", categories_version())
+
+
+def categories_last_modified(request, *args, **kwargs):
+    return _categories_changed_at()
 
 
 class EventViewSet(viewsets.ModelViewSet):
@@ -44,6 +152,17 @@ class EventViewSet(viewsets.ModelViewSet):
     search_fields = ['title', 'place', 'description']
     ordering = ['-start_date', '-start_time']
 
+    # Responses cached once for every user (cache_shared_response)
+    shared_actions = ('list', 'calendar')
+
+    def is_shared(self):
+        """
+        Whether the response is the same for every user. Ordering by
+        is_enrolled depends on the user, so it is never shared.
+        """
+        ordering = self.request.query_params.get('ordering', '')
+        return self.action in self.shared_actions and 'is_enrolled' not in ordering
+
     def get_queryset(self):
         """
         Get events from database.
@@ -57,25 +176,38 @@ class EventViewSet(viewsets.ModelViewSet):
             participants_count= Count("student_events", distinct=True)
         )
 
-        # Annotate with is_enrolled if user is authenticated
-        if self.request.user.is_authenticated:
+        # Annotate with is_enrolled if user is authenticated; shared pages get it merged afterwards
+        if self.request.user.is_authenticated and not self.is_shared():
             subquery = StudentEvent.objects.filter(
-                event=OuterRef("pk"), student = self.request.user
+                event=OuterRef("pk"), student_id=self.request.user.id
             )
             queryset = queryset.annotate(is_enrolled= Exists(subquery))
         else:
             queryset = queryset.annotate(is_enrolled= Value(False, output_field= BooleanField()))
 
         return queryset
-    
+
+    @method_decorator(vary_on_headers("Authorization"))
+    @cache_shared_response("list")
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @method_decorator(vary_on_headers("Authorization"))
+    @method_decorator(condition(etag_func=event_etag, last_modified_func=event_last_modified))
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Event detail; answers 304 Not Modified from the version stamps of the
+        event without running the annotated queryset.
+        """
+        return super().retrieve(request, *args, **kwargs)
+
     def check_event_permission(self, instance):
         """
         Check if user has permission to modify the event.
         """
         user = self.request.user
-        is_admin = user.groups.filter(name='Administrator').exists()
-        is_creator = (user.id == instance.id_creator.id)
-        if not (is_creator or is_admin):
+        is_creator = (user.id == instance.id_creator_id)
+        if not (is_creator or is_admin(self.request)):
             raise PermissionDenied("No tiene permiso para modificar este evento.")
         
     def perform_update(self, serializer):
@@ -85,7 +217,11 @@ class EventViewSet(viewsets.ModelViewSet):
         """
         instance = self.get_object()
         self.check_event_permission(instance)
-        serializer.save()
+        event = serializer.save()
+
+        # Reminders depend on the start of the event
+        if event.starts_at != instance.starts_at:
+            transaction.on_commit(lambda: sync_reminders.delay(event_id=event.id, reset=True))
         
     
     def perform_destroy(self, instance):
@@ -93,9 +229,8 @@ class EventViewSet(viewsets.ModelViewSet):
         Soft delete: marks event as inactive instead of removing from DB.
         """
         user = self.request.user
-        is_admin = user.groups.filter(name='Administrator').exists()
-        is_creator = (user.id == instance.id_creator.id)
-        if not (is_creator or is_admin):
+        is_creator = (user.id == instance.id_creator_id)
+        if not (is_creator or is_admin(self.request)):
             raise PermissionDenied("No tiene permiso para eliminar este evento.")
 
         instance.is_active = False
@@ -245,11 +380,14 @@ class EventViewSet(viewsets.ModelViewSet):
                 event=event,
                 student=user
             )
+            transaction.on_commit(lambda: sync_reminders.delay(event_id=event.id, user_id=user.id))
         
         serializer = self.get_serializer(student_event)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @action(detail=False, methods=['get'], url_path='calendar', permission_classes=[IsAuthenticatedOrReadOnly])
+    @method_decorator(vary_on_headers("Authorization"))
+    @cache_shared_response("calendar")
     def calendar(self, request):
         """
         Retrieve upcoming events within a date range.
@@ -406,7 +544,7 @@ class EventViewSet(viewsets.ModelViewSet):
         Retrieve the attendees by category of the user.
         """
         user = request.user
-        categories = Category.objects.all()
+        categories = cached_categories().values()
         stats_by_category = []
 
         for category in categories:
@@ -479,23 +617,15 @@ class EventViewSet(viewsets.ModelViewSet):
         
         # Create notification for administrators
         try:
-            # Create the notification
-            notification = Notification.objects.create(
+            # Get all administrators
+            admin_group = Group.objects.get(name=ADMINISTRATOR_GROUP)
+
+            # Create the notification and a UserNotification for each admin with read=False
+            notify_users(
+                admin_group.user_set.all(),
                 description=f"User {request.user.username} reported event '{event.title}': {reason}",
                 type='REPORT_ALERT'
             )
-            
-            # Get all administrators
-            admin_group = Group.objects.get(name='Administrator')
-            admins = admin_group.user_set.all()
-            
-            # Create UserNotification for each admin with read=False
-            for admin in admins:
-                UserNotification.objects.create(
-                    user=admin,
-                    notification=notification,
-                    read=False
-                )
         except Group.DoesNotExist:
             # If Administrator group doesn't exist, just continue without creating notifications
             pass
@@ -724,23 +854,15 @@ class EventCommentViewSet(viewsets.ModelViewSet):
         
         # Create notification for administrators
         try:
-            # Create the notification
-            notification = Notification.objects.create(
+            # Get all administrators
+            admin_group = Group.objects.get(name=ADMINISTRATOR_GROUP)
+
+            # Create the notification and a UserNotification for each admin with read=False
+            notify_users(
+                admin_group.user_set.all(),
                 description=f"User {request.user.username} reported a comment by {comment.author.username} on event '{comment.event.title}': {reason}",
                 type='REPORT_ALERT'
             )
-            
-            # Get all administrators
-            admin_group = Group.objects.get(name='Administrator')
-            admins = admin_group.user_set.all()
-            
-            # Create UserNotification for each admin with read=False
-            for admin in admins:
-                UserNotification.objects.create(
-                    user=admin,
-                    notification=notification,
-                    read=False
-                )
         except Group.DoesNotExist:
             # If Administrator group doesn't exist, just continue without creating notifications
             pass
@@ -768,6 +890,30 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly]
     queryset = Category.objects.all()
 
+    @method_decorator(condition(etag_func=categories_etag, last_modified_func=categories_last_modified))
+    def list(self, request, *args, **kwargs):
+        """
+        Served from the in-process category catalogue; explicit orderings go
+        through the database.
+        """
+        if 'ordering' in request.query_params:
+            return super().list(request, *args, **kwargs)
+        categories = list(cached_categories().values())
+        page = self.paginate_queryset(categories)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(categories, many=True).data)
+
+    @method_decorator(condition(etag_func=categories_etag, last_modified_func=categories_last_modified))
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            category = cached_categories().get(int(kwargs['pk']))
+        except ValueError:
+            category = None
+        if category is None:
+            raise NotFound()
+        return Response(self.get_serializer(category).data)
+
 
 @extend_schema_view(
     list=extend_schema(tags=['Comment Reports']),
@@ -792,8 +938,7 @@ class CommentReportViewSet(viewsets.ReadOnlyModelViewSet):
         if getattr(self, 'swagger_fake_view', False):
             return EventComment.objects.none()
 
-        user = self.request.user
-        if not user.groups.filter(name='Administrator').exists():
+        if not is_admin(self.request):
             raise PermissionDenied("Solo los administradores pueden ver los comentarios reportados.")
         
         # Get comments that have at least one report
@@ -836,8 +981,7 @@ class CommentReportViewSet(viewsets.ReadOnlyModelViewSet):
         Disable a reported comment.
         Only administrators can disable comments.
         """
-        user = request.user 
-        if not user.groups.filter(name='Administrator').exists():
+        if not is_admin(request):
             raise PermissionDenied("Solo los administradores pueden inhabilitar comentarios.")
         
         try:
@@ -853,7 +997,7 @@ class CommentReportViewSet(viewsets.ReadOnlyModelViewSet):
 
         comment.is_active = False
         comment.disabled_at = timezone.now()
-        comment.disabled_by = user
+        comment.disabled_by = request.user
         comment.save()
 
         return Response(
@@ -867,8 +1011,7 @@ class CommentReportViewSet(viewsets.ReadOnlyModelViewSet):
         Restore a disabled comment.
         Only administrators can restore comments.
         """
-        user = request.user
-        if not user.groups.filter(name='Administrator').exists():
+        if not is_admin(request):
             raise PermissionDenied("Solo los administradores pueden restaurar comentarios.")
 
         try:
@@ -930,8 +1073,7 @@ class EventReportViewSet(viewsets.ReadOnlyModelViewSet):
         if getattr(self, 'swagger_fake_view', False):
             return Event.objects.none()
 
-        user = self.request.user
-        if not user.groups.filter(name='Administrator').exists():
+        if not is_admin(self.request):
             raise PermissionDenied("Solo los administradores pueden ver los eventos reportados.")
         
         # Get events that have at least one report
@@ -1004,8 +1146,7 @@ class EventReportViewSet(viewsets.ReadOnlyModelViewSet):
         Disable a reported event.
         Only administrators can disable events.
         """
-        user = request.user
-        if not user.groups.filter(name='Administrator').exists():
+        if not is_admin(request):
             raise PermissionDenied("Solo los administradores pueden inhabilitar eventos.")
         
         try:
@@ -1021,7 +1162,7 @@ class EventReportViewSet(viewsets.ReadOnlyModelViewSet):
 
         event.is_active = False
         event.disabled_at = timezone.now()
-        event.disabled_by = user
+        event.disabled_by = request.user
         event.save()
 
         return Response(
@@ -1035,8 +1176,7 @@ class EventReportViewSet(viewsets.ReadOnlyModelViewSet):
         Restore a disabled event.
         Only administrators can restore events.
         """
-        user = request.user
-        if not user.groups.filter(name='Administrator').exists():
+        if not is_admin(request):
             raise PermissionDenied("Solo los administradores pueden restaurar eventos.")
 
         try:
@@ -1075,3 +1215,10 @@ class NotificationPreferenceViewSet(
         obj, _ = NotificationPreference.objects.get_or_create(user=self.request.user)
         self.check_object_permissions(self.request, obj)
         return obj
+
+    def perform_update(self, serializer):
+        """
+        Update preferences and reschedule the reminders of the user.
+        """
+        prefs = serializer.save()
+        transaction.on_commit(lambda: sync_reminders.delay(user_id=prefs.user_id, reset=True))
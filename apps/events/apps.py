@@ -1,6 +1,22 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class EventsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.events'
\ No newline at end of file
+    name = 'apps.events'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from apps.events.models import Category, Event, StudentEvent
+        from apps.events.signals import invalidate_categories, invalidate_events, touch_enrolled_event, touch_event_renditions, touch_user_events
+        from apps.media.signals import renditions_ready
+
+        post_save.connect(invalidate_categories, sender=Category)
+        post_delete.connect(invalidate_categories, sender=Category)
+        post_save.connect(invalidate_events, sender=Event)
+        post_delete.connect(invalidate_events, sender=Event)
+        post_save.connect(touch_enrolled_event, sender=StudentEvent)
+        post_delete.connect(touch_enrolled_event, sender=StudentEvent)
+        post_save.connect(touch_user_events, sender=get_user_model())
+        renditions_ready.connect(touch_event_renditions, sender=Event)
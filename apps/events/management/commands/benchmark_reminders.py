@@ -0,0 +1,124 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.events.models import Event, EventReminder, StudentEvent
+from apps.events.tasks import POST_EVENT_DELAY, send_due_reminders, send_event_reminder, schedule_post_event_reminders
+from apps.mail.tasks import drain_outbox
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el throughput del envío de recordatorios (uno por tarea vs. por lotes) "
+        "con el backend de email locmem. Los datos se crean en una transacción que se revierte."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--attendees", type=int, default=2000)
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument(
+            "--kind", choices=["pre", "post"], default="pre",
+            help="pre: recordatorios previos al evento; post: pipeline de calificación tras el evento."
+        )
+
+    def handle(self, *args, **opts):
+        attendees = opts["attendees"]
+        batch_size = opts["batch_size"]
+
+        with override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend"):
+            if opts["kind"] == "post":
+                results = [
+                    ("pipeline post-evento", self._run(attendees, lambda ids: self._post_pipeline(batch_size), post=True)),
+                ]
+            else:
+                results = [
+                    ("uno por tarea", self._run(attendees, self._send_one_by_one)),
+                    (f"lotes de {batch_size}", self._run(attendees, lambda ids: self._drain(batch_size))),
+                ]
+
+        for label, (elapsed, sent) in results:
+            self.stdout.write(
+                f"{label}: {sent} correos en {elapsed:.2f}s ({sent / elapsed:.0f} correos/s)"
+            )
+
+    def _post_pipeline(self, batch_size):
+        schedule_post_event_reminders.run()
+        self._drain(batch_size)
+
+    def _send_one_by_one(self, reminder_ids):
+        for pk in reminder_ids:
+            send_event_reminder.run(pk)
+            drain_outbox.run(1)
+
+    def _drain(self, batch_size):
+        while send_due_reminders.run(batch_size):
+            pass
+        while drain_outbox.run(batch_size):
+            pass
+
+    def _run(self, attendees, send, post=False):
+        """
+        Create an event with its due reminders (or an ended event with checked-in
+        attendees when post), send them with `send` and roll everything back.
+        """
+        result = None
+        try:
+            with transaction.atomic():
+                reminder_ids = self._seed_post(attendees) if post else self._seed(attendees)
+                mail.outbox = []
+                started = time.perf_counter()
+                send(reminder_ids)
+                result = (time.perf_counter() - started, len(mail.outbox))
+                raise _Rollback
+        except _Rollback:
+            pass
+        return result
+
+    def _seed(self, attendees):
+        now = timezone.now()
+        start = now + timedelta(hours=1)
+        creator = User.objects.create(username="bench-creator", email="bench-creator@eventify.local")
+        event = Event.objects.create(
+            title="Benchmark", place="Auditorio", id_creator=creator, timezone="UTC",
+            start_date=start.date(), start_time=start.time(),
+            end_date=start.date(), end_time=(start + timedelta(minutes=30)).time(),
+        )
+        users = User.objects.bulk_create([
+            User(username=f"bench-{i}", email=f"bench-{i}@eventify.local")
+            for i in range(attendees)
+        ])
+        StudentEvent.objects.bulk_create([StudentEvent(event=event, student=u) for u in users])
+        reminders = EventReminder.objects.bulk_create([
+            EventReminder(event=event, user=u, kind="pre", scheduled_for=now - timedelta(minutes=1))
+            for u in users
+        ])
+        return [r.id for r in reminders]
+
+    def _seed_post(self, attendees):
+        now = timezone.now()
+        # Ended long enough ago for the rating prompts to be due right away
+        end = now - POST_EVENT_DELAY - timedelta(minutes=1)
+        creator = User.objects.create(username="bench-creator", email="bench-creator@eventify.local")
+        event = Event.objects.create(
+            title="Benchmark", place="Auditorio", id_creator=creator, timezone="UTC",
+            start_date=end.date(), start_time=(end - timedelta(minutes=30)).time(),
+            end_date=end.date(), end_time=end.time(),
+        )
+        users = User.objects.bulk_create([
+            User(username=f"bench-{i}", email=f"bench-{i}@eventify.local")
+            for i in range(attendees)
+        ])
+        StudentEvent.objects.bulk_create([StudentEvent(event=event, student=u, attended=True) for u in users])
+        return []
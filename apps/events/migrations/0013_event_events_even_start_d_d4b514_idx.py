@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0012_merge_20251210_1745'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['start_date'], name='events_even_start_d_d4b514_idx'),
+        ),
+    ]
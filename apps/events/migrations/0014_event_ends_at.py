@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:06
+
+from django.db import migrations, models
+from django.db.models import DateTimeField, ExpressionWrapper, F
+from django.db.models.functions import Cast
+
+
+def populate_ends_at(apps, schema_editor):
+    """
+    Compute ends_at (end_date + end_time) for the existing events.
+    """
+    Event = apps.get_model('events', 'Event')
+    Event.objects.update(
+        ends_at=Cast(
+            ExpressionWrapper(F('end_date') + F('end_time'), output_field=DateTimeField()),
+            DateTimeField()
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0013_event_events_even_start_d_d4b514_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, help_text='Fin del evento (end_date + end_time), para consultas indexadas', null=True),
+        ),
+        migrations.RunPython(populate_ends_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:16
+
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import apps.events.utils
+from django.db import migrations, models
+from django.db.models import F
+
+
+def combine(dt_date, dt_time, tz):
+    """
+    Frozen copy of apps.events.utils.combine at the time of this migration:
+    wall-clock date and time in the timezone tz, as an aware datetime in UTC.
+    """
+    if dt_date is None or dt_time is None:
+        return None
+    return datetime.combine(dt_date, dt_time, tzinfo=ZoneInfo(tz)).astimezone(ZoneInfo("UTC"))
+
+
+def populate_instants(apps, schema_editor):
+    """
+    Compute starts_at and ends_at in the timezone of each event. The unsent
+    reminders were scheduled from the start (or end) read as UTC, so they are
+    shifted by the same offset.
+    """
+    Event = apps.get_model('events', 'Event')
+    EventReminder = apps.get_model('events', 'EventReminder')
+    unsent = EventReminder.objects.filter(sent_at__isnull=True)
+
+    events = list(Event.objects.only('start_date', 'start_time', 'end_date', 'end_time', 'timezone', 'ends_at'))
+    for event in events:
+        event.starts_at = combine(event.start_date, event.start_time, event.timezone)
+        as_utc = combine(event.start_date, event.start_time, 'UTC')
+        if event.starts_at != as_utc:
+            unsent.filter(event=event, kind='pre').update(scheduled_for=F('scheduled_for') + (event.starts_at - as_utc))
+
+        ends_at = combine(event.end_date, event.end_time, event.timezone)
+        if event.ends_at is not None and ends_at != event.ends_at:
+            unsent.filter(event=event, kind='post').update(scheduled_for=F('scheduled_for') + (ends_at - event.ends_at))
+        event.ends_at = ends_at
+    Event.objects.bulk_update(events, ['starts_at', 'ends_at'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0015_eventreminder_queue_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='starts_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, help_text='Inicio del evento en UTC (start_date + start_time en su zona horaria)', null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='timezone',
+            field=models.CharField(default=apps.events.utils.default_event_timezone, help_text='Zona horaria (IANA) de las fechas y horas del evento', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, help_text='Fin del evento en UTC (end_date + end_time en su zona horaria)', null=True),
+        ),
+        migrations.RunPython(populate_instants, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0016_event_timezone_starts_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='cover_image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Versiones redimensionadas de la portada (thumbnail, card, full)'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0017_event_cover_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, help_text='Última modificación del evento (o de sus inscripciones), para ETag/Last-Modified'),
+            preserve_default=False,
+        ),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 from django.conf import settings
 from django.db.models.query_utils import Q
 
+from apps.events.utils import combine, default_event_timezone
+
 
 class Category(models.Model):
     """
@@ -23,6 +25,7 @@ class Event(models.Model):
     title = models.CharField(max_length=120, null=True)
     description = models.TextField(blank=True)
     cover_image = models.ImageField(upload_to="events/covers/", null=True, blank=True)
+    cover_image_renditions = models.JSONField(default=dict, blank=True, editable=False, help_text="Versiones redimensionadas de la portada (thumbnail, card, full)")
     place = models.CharField(max_length=200)
     start_time = models.TimeField()
     start_date = models.DateField()
@@ -30,6 +33,10 @@ class Event(models.Model):
     end_date = models.DateField()
     id_creator = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     max_capacity = models.PositiveIntegerField(null=True, blank=True, help_text="Capacidad máxima de asistentes. Si es null, capacidad ilimitada.")
+    timezone = models.CharField(max_length=64, default=default_event_timezone, help_text="Zona horaria (IANA) de las fechas y horas del evento")
+    starts_at = models.DateTimeField(null=True, blank=True, db_index=True, editable=False, help_text="Inicio del evento en UTC (start_date + start_time en su zona horaria)")
+    ends_at = models.DateTimeField(null=True, blank=True, db_index=True, editable=False, help_text="Fin del evento en UTC (end_date + end_time en su zona horaria)")
+    updated_at = models.DateTimeField(auto_now=True, help_text="Última modificación del evento (o de sus inscripciones), para ETag/Last-Modified")
     
     is_active = models.BooleanField(default=True, help_text="Indica si el evento está activo o inhabilitado")
     disabled_at = models.DateTimeField(null=True, blank=True)
@@ -55,6 +62,22 @@ class Event(models.Model):
         blank=True
     )
 
+    class Meta:
+        indexes = [models.Index(fields=["start_date"])]
+
+    def save(self, *args, **kwargs):
+        self.starts_at = combine(self.start_date, self.start_time, self.timezone)
+        self.ends_at = combine(self.end_date, self.end_time, self.timezone)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = set(update_fields) | {"updated_at"}
+            if {"start_date", "start_time", "timezone"} & update_fields:
+                update_fields.add("starts_at")
+            if {"end_date", "end_time", "timezone"} & update_fields:
+                update_fields.add("ends_at")
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
+
 
 class StudentEvent(models.Model):
     """
@@ -167,16 +190,39 @@ class EventReminder(models.Model):
         ("post", "Post-event"),
     ]
 
+    # pending -> queued (claimed by a dispatched task) -> sent / skipped / failed
+    STATUS_PENDING = "pending"
+    STATUS_QUEUED = "queued"
+    STATUS_SENT = "sent"
+    STATUS_SKIPPED = "skipped"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_SKIPPED, "Skipped"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
     event = models.ForeignKey("events.Event", on_delete=models.CASCADE, related_name='reminders')
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='event_reminders')
     kind = models.CharField(max_length=10, choices=KIND_CHOICES, default="pre")
     scheduled_for = models.DateTimeField()
     sent_at = models.DateTimeField(null=True, blank=True)
-    status = models.CharField(max_length=20, default="pending")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    queued_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=['event', 'user', 'kind'], name="unique_pre_post_reminder")
         ]
 
-        indexes = [models.Index(fields=["scheduled_for"]), models.Index(fields=["event", "user"])]
+        indexes = [
+            models.Index(fields=["scheduled_for"]),
+            models.Index(fields=["event", "user"]),
+            models.Index(
+                fields=["status", "scheduled_for"],
+                name="reminder_unsent_idx",
+                condition=models.Q(status__in=["pending", "queued"]),
+            ),
+        ]
@@ -0,0 +1,49 @@
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.events.models import Event
+from apps.events.utils import bump_categories_version, bump_events_version, touch_events
+
+
+def invalidate_categories(sender, **kwargs):
+    """
+    A category was created, renamed or deleted: change the categories version.
+    """
+    transaction.on_commit(bump_categories_version)
+
+
+def invalidate_events(sender, **kwargs):
+    """
+    An event was saved or deleted: change the events version.
+    """
+    transaction.on_commit(bump_events_version)
+
+
+# User fields embedded in the event payload (id_creator and disabled_by)
+EMBEDDED_USER_FIELDS = frozenset({"username", "email", "first_name", "last_name"})
+
+
+def touch_user_events(sender, instance, created, update_fields=None, **kwargs):
+    """
+    The creator or the admin who disabled events changed: refresh those
+    events, so their ETags and the shared pages that embed them change.
+    """
+    if created or (update_fields is not None and not EMBEDDED_USER_FIELDS.intersection(update_fields)):
+        return
+    Event.objects.filter(Q(id_creator_id=instance.pk) | Q(disabled_by_id=instance.pk)).update(updated_at=timezone.now())
+    transaction.on_commit(bump_events_version)
+
+
+def touch_enrolled_event(sender, instance, **kwargs):
+    """
+    Enrollments change participants_count and is_enrolled of the event payload.
+    """
+    touch_events([instance.event_id])
+
+
+def touch_event_renditions(sender, pk, **kwargs):
+    """
+    New cover renditions change the event payload.
+    """
+    touch_events([pk])
@@ -1,77 +1,370 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
 from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef
 from django.db.models.query_utils import Q
 from django.utils import timezone
-from django.core.mail import send_mail
-from .models import EventReminder, StudentEvent
-from .utils import reminder_datetime
+from apps.mail.rendering import templated_email
+from apps.mail.utils import enqueue_emails
+from apps.notifications.utils import push_to_user
+from .models import Event, EventRating, EventReminder, NotificationPreference, StudentEvent
+from .utils import DEFAULT_HOURS_BEFORE, reminder_instant_expression
+
+# Reminders due up to REMINDER_LOOKBACK ago are still dispatched, so a reminder
+# scheduled between two scans is not lost.
+REMINDER_LOOKBACK = timedelta(minutes=10)
+REMINDER_LOOKAHEAD = timedelta(minutes=10)
+# Reminders are handed to the broker as eta tasks only when they are this close
+REMINDER_ETA_HORIZON = timedelta(minutes=15)
+# Events that ended up to POST_EVENT_LOOKBACK ago still get their rating prompts,
+# which are sent POST_EVENT_DELAY after the end of the event.
+POST_EVENT_LOOKBACK = timedelta(days=1)
+POST_EVENT_DELAY = timedelta(hours=1)
+# A queued reminder whose task has not run after this long (lost task, dead
+# worker) is claimed again by the reconciliation sweep.
+REMINDER_QUEUED_TIMEOUT = timedelta(minutes=30)
+
+UNSENT_STATUSES = (EventReminder.STATUS_PENDING, EventReminder.STATUS_QUEUED)
+
+logger = logging.getLogger(__name__)
 
 
 @shared_task(bind=True, max_retries=3, retry_backoff=True)
 def send_event_reminder(self, reminder_id):
-    try:
-        r = (
-            EventReminder.objects
-            .select_for_update(skip_locked=True)
-            .select_related("event", "user")
-            .get(pk=reminder_id)
+    with transaction.atomic():
+        try:
+            r = (
+                EventReminder.objects
+                .select_for_update(of=("self",))
+                .select_related("event", "user", "user__notif_prefs")
+                .annotate(has_rated=Exists(
+                    EventRating.objects.filter(event=OuterRef("event"), user=OuterRef("user"))
+                ))
+                .get(pk=reminder_id)
+            )
+        except EventReminder.DoesNotExist:
+            return "not_found"
+
+        if r.status not in UNSENT_STATUSES:
+            return "already_sent"
+
+        if timezone.now() < r.scheduled_for:
+            return "too_early"
+
+        email = _process(r, timezone.now())
+        if email is not None:
+            enqueue_emails([email])
+        r.save(update_fields=["status", "sent_at"])
+
+    if r.status == EventReminder.STATUS_SENT:
+        _push_reminder(r)
+    return r.status
+
+
+@shared_task(bind=True, max_retries=3, retry_backoff=True)
+def send_due_reminders(self, batch_size=None, reminder_ids=None):
+    """
+    Send a batch of reminders: the given queued reminder_ids, or up to batch_size
+    due unsent ones. The rows are locked, their emails queued in the outbox and
+    their final status written in one bulk update, all in the same transaction,
+    so a reminder is never emailed twice. Rows locked by another worker are
+    skipped, so several of these tasks can work through the backlog concurrently.
+    """
+    batch_size = batch_size or settings.REMINDERS_BATCH_SIZE
+    now = timezone.now()
+
+    reminders = EventReminder.objects.filter(
+        status__in=UNSENT_STATUSES, scheduled_for__lte=now, event__disabled_at__isnull=True
+    )
+    if reminder_ids is not None:
+        reminders = reminders.filter(id__in=reminder_ids, status=EventReminder.STATUS_QUEUED)
+
+    with transaction.atomic():
+        batch = list(
+            reminders
+            .select_for_update(skip_locked=True, of=("self",))
+            .select_related("event", "user", "user__notif_prefs")
+            .annotate(has_rated=Exists(
+                EventRating.objects.filter(event=OuterRef("event"), user=OuterRef("user"))
+            ))
+            .order_by("scheduled_for")[:batch_size]
         )
-    except EventReminder.DoesNotExist:
-        return "not_found"
+        if not batch:
+            return 0
+
+        emails = [email for r in batch if (email := _process(r, now)) is not None]
+        enqueue_emails(emails)
+
+        EventReminder.objects.bulk_update(batch, ["status", "sent_at"])
 
-    if r.sent_at:
-        return "already_sent"
+    sent = [r for r in batch if r.status == EventReminder.STATUS_SENT]
+    for r in sent:
+        _push_reminder(r)
+    return len(sent)
 
-    if timezone.now() < r.scheduled_for:
-        return "too_early"
 
+def _process(r, now):
+    """
+    Decide the final status of a locked reminder and build its email when it
+    has to be sent. Returns the unsaved OutboundEmail, or None.
+    """
+    r.sent_at = now
+    # The rating prompt is pointless once the user has rated the event
+    if r.kind == "post" and getattr(r, "has_rated", False):
+        r.status = EventReminder.STATUS_SKIPPED
+        return None
     if not getattr(getattr(r.user, "notif_prefs", None), "email_enabled", True):
-        r.status = "skipped"
-        r.sent_at = timezone.now()
-        r.save(update_fields=["status", "sent_at"])
-        return "skipped"
+        r.status = EventReminder.STATUS_SKIPPED
+        return None
+    try:
+        email = _reminder_email(r)
+    except Exception:
+        logger.exception("Could not build the email of reminder %s", r.pk)
+        r.status = EventReminder.STATUS_FAILED
+        return None
+    r.status = EventReminder.STATUS_SENT
+    return email
+
 
+def _reminder_email(r):
+    """
+    Build the outbox email of a reminder: the pre-event notice or the post-event rating prompt.
+    """
     ev = r.event
-    subject = f"Recordatorio: {ev.title} empieza pronto"
-    body = (
-        f"Hola {r.user.first_name or r.user.username},\n\n"
-        f"Tu evento '{ev.title}' será el {ev.start_date} a las {ev.start_time} en {ev.place}.\n"
-        f"¡Nos vemos allí!\n\nEventify"
+    context = {
+        "name": r.user.first_name or r.user.username,
+        "event": ev,
+        "event_url": f"{settings.FRONTEND_URL}/events/{ev.id}",
+    }
+    return templated_email(f"reminder_{r.kind}", context, r.user.email)
+
+
+def _push_reminder(r):
+    """
+    Push a sent reminder to the live stream of the user.
+    """
+    ev = r.event
+    push_to_user(r.user_id, "reminder", {
+        "event": ev.id,
+        "title": ev.title,
+        "place": ev.place,
+        "start_date": ev.start_date,
+        "start_time": ev.start_time,
+        "starts_at": ev.starts_at,
+        "kind": r.kind,
+    })
+
+
+def sync_pre_reminders(enrollments, window_start, window_end=None):
+    """
+    Upsert the pre-event reminders of the given StudentEvent queryset whose instant
+    is after window_start (and before window_end, when given). The reminder instant
+    is computed by the database. Reminders already at that instant are left alone,
+    so their claim is kept; moved ones go back to pending. Returns the set of
+    upserted instants.
+    """
+    # A reminder is at most max_hours before the start of its event, so only the
+    # events starting before window_end + max_hours can have one in the window.
+    enrollments = enrollments.filter(event__starts_at__gte=window_start)
+    if window_end is not None:
+        max_hours = NotificationPreference.objects.aggregate(m=Max("hours_before"))["m"] or 0
+        max_hours = max(max_hours, DEFAULT_HOURS_BEFORE)
+        enrollments = enrollments.filter(event__starts_at__lte=window_end + timedelta(hours=max_hours))
+
+    already_sent = EventReminder.objects.filter(
+        event=OuterRef("event"), user=OuterRef("student"), kind="pre", sent_at__isnull=False
+    )
+    up_to_date = EventReminder.objects.filter(
+        event=OuterRef("event"), user=OuterRef("student"), kind="pre", scheduled_for=OuterRef("remind_at")
     )
-    send_mail(subject, body, None, [r.user.email], fail_silently=False)
-    r.status = "sent"
-    r.sent_at = timezone.now()
-    r.save(update_fields=["status", "sent_at"])
-    return "sent"
+    rows = (enrollments
+            .filter(event__disabled_at__isnull=True)
+            .filter(Q(student__notif_prefs__email_enabled=True) | Q(student__notif_prefs__isnull=True))
+            .annotate(remind_at=reminder_instant_expression())
+            .filter(remind_at__gte=window_start)
+            .exclude(Exists(already_sent))
+            .exclude(Exists(up_to_date))
+            )
+    if window_end is not None:
+        rows = rows.filter(remind_at__lte=window_end)
+    rows = list(rows.values_list("event_id", "student_id", "remind_at"))
+
+    EventReminder.objects.bulk_create(
+        [EventReminder(event_id=event_id, user_id=user_id, kind="pre", scheduled_for=remind_at,
+                       status=EventReminder.STATUS_PENDING)
+         for event_id, user_id, remind_at in rows],
+        update_conflicts=True,
+        unique_fields=["event", "user", "kind"],
+        update_fields=["scheduled_for", "status"],
+        batch_size=500,
+    )
+    return {remind_at for _, _, remind_at in rows}
+
+
+def claimable(reminders, now):
+    """
+    Reminders of the queryset that may be claimed for dispatch: pending ones and
+    queued ones whose task was lost (queued for longer than REMINDER_QUEUED_TIMEOUT).
+    """
+    return reminders.filter(
+        Q(status=EventReminder.STATUS_PENDING)
+        | Q(status=EventReminder.STATUS_QUEUED, queued_at__lt=now - REMINDER_QUEUED_TIMEOUT),
+        sent_at__isnull=True,
+        event__disabled_at__isnull=True,
+    )
+
+
+def dispatch(reminders, eta=False):
+    """
+    Claim the claimable reminders of the queryset (pending -> queued) in one locked
+    update and enqueue one send_due_reminders task per REMINDERS_BATCH_SIZE of
+    them, with their ids, once the claim commits. With eta, the tasks are grouped
+    by instant and delivered at it. A claimed reminder is never enqueued again by
+    a later scan, so a lagging worker pool does not multiply the queue traffic.
+    Returns the number of claimed reminders.
+    """
+    now = timezone.now()
+    batch_size = settings.REMINDERS_BATCH_SIZE
+
+    with transaction.atomic():
+        claimed = list(
+            claimable(reminders, now)
+            .select_for_update(skip_locked=True, of=("self",))
+            .order_by("scheduled_for")
+            .values_list("id", "scheduled_for")
+        )
+        if not claimed:
+            return 0
+        groups = defaultdict(list)
+        for pk, instant in claimed:
+            groups[instant if eta else None].append(pk)
+
+        # queued_at is when the task is due to run, so the lost-task timeout
+        # only starts counting then
+        for instant, ids in groups.items():
+            EventReminder.objects.filter(id__in=ids).update(
+                status=EventReminder.STATUS_QUEUED, queued_at=max(instant or now, now)
+            )
+
+        def enqueue():
+            for instant, ids in groups.items():
+                for i in range(0, len(ids), batch_size):
+                    send_due_reminders.apply_async(
+                        kwargs={"batch_size": batch_size, "reminder_ids": ids[i:i + batch_size]},
+                        eta=instant,
+                    )
+
+        transaction.on_commit(enqueue)
+
+    return len(claimed)
+
+
+def schedule_delivery(reminders):
+    """
+    Claim the unsent reminders of the queryset that fall inside REMINDER_ETA_HORIZON
+    and hand them to the broker as eta tasks at their instant. Later ones are
+    scheduled by the reconciliation sweep, which keeps the eta tasks held by the
+    broker short-lived.
+    """
+    horizon = timezone.now() + REMINDER_ETA_HORIZON
+    return dispatch(reminders.filter(scheduled_for__lte=horizon), eta=True)
+
+
+@shared_task
+def sync_reminders(event_id=None, user_id=None, reset=False):
+    """
+    Create or update at write time the pre-event reminders of an enrollment, an
+    event or a user, and schedule their delivery. With reset, the unsent reminders
+    are dropped first so changes that move them to the past do not leave stale rows.
+    """
+    enrollments = StudentEvent.objects.all()
+    if event_id is not None:
+        enrollments = enrollments.filter(event_id=event_id)
+    if user_id is not None:
+        enrollments = enrollments.filter(student_id=user_id)
+
+    reminders = EventReminder.objects.filter(
+        Exists(enrollments.filter(event=OuterRef("event"), student=OuterRef("user"))),
+        kind="pre",
+        sent_at__isnull=True,
+    )
+    if reset:
+        reminders.delete()
+
+    instants = sync_pre_reminders(enrollments, timezone.now())
+    if instants:
+        schedule_delivery(reminders)
+    return len(instants)
 
 
 @shared_task
 def scan_and_schedule_reminders():
+    """
+    Reconciliation sweep. Reminders are created at write time by sync_reminders;
+    this only catches the enrollments missed there, schedules the reminders that
+    entered the eta horizon and dispatches the due ones left behind, all over
+    narrow indexed windows. Queued reminders whose task was lost are dispatched
+    again while their event has not started. Returns the number of reminders
+    dispatched right away.
+    """
     now = timezone.now()
-    window_end = now + timezone.timedelta(minutes=10)
+    window_start = now - REMINDER_LOOKBACK
+    window_end = now + REMINDER_LOOKAHEAD
 
-    se_qs = (StudentEvent.objects
-             .select_related("event", "student")
-             .filter(event__disabled_at__isnull=True)
-             .filter(Q(event__start_date__gte=timezone.localdate()))
-             .filter(Q(student__notif_prefs__email_enabled=True) | Q(student__notif_prefs__isnull=True))
-             )
+    sync_pre_reminders(StudentEvent.objects.all(), window_start, window_end)
 
-    created = 0
-    for se in se_qs:
-        user, ev = se.student, se.event
-        sched_for = reminder_datetime(ev, user)
+    pending = EventReminder.objects.filter(kind="pre")
+    schedule_delivery(pending.filter(scheduled_for__gt=now))
+    dispatched = dispatch(pending.filter(scheduled_for__gte=window_start, scheduled_for__lte=now))
 
-        if sched_for < now - timezone.timedelta(minutes=1) or sched_for > window_end:
-            continue
+    # queued_at >= scheduled_for, so a lost task only becomes claimable after
+    # the lookback window has passed
+    lost = pending.filter(
+        status=EventReminder.STATUS_QUEUED,
+        scheduled_for__lt=now - REMINDER_QUEUED_TIMEOUT,
+        event__starts_at__gt=now,
+    )
+    return dispatched + dispatch(lost)
 
-        r, _  = EventReminder.objects.get_or_create(event=ev, user=user, kind="pre", defaults={"scheduled_for": sched_for})
 
-        if r.scheduled_for != sched_for and not r.sent_at:
-            r.scheduled_for = sched_for
-            r.save(update_fields=["scheduled_for"])
+@shared_task
+def schedule_post_event_reminders():
+    """
+    Create the post-event rating prompts of the events that just ended, for the
+    checked-in attendees who have not rated them, and dispatch the due ones in
+    batches. Events are found through the ends_at index, so the cost depends on
+    the events that ended in the lookback window only.
+    """
+    now = timezone.now()
+    ended = Event.objects.filter(
+        ends_at__gte=now - POST_EVENT_LOOKBACK,
+        ends_at__lte=now,
+        disabled_at__isnull=True,
+    )
+
+    rated = EventRating.objects.filter(event=OuterRef("event"), user=OuterRef("student"))
+    prompted = EventReminder.objects.filter(event=OuterRef("event"), user=OuterRef("student"), kind="post")
+    rows = (StudentEvent.objects
+            .filter(event__in=ended, attended=True)
+            .exclude(Exists(rated))
+            .exclude(Exists(prompted))
+            .values_list("event_id", "student_id", "event__ends_at")
+            .iterator(chunk_size=2000)
+            )
+
+    created = EventReminder.objects.bulk_create(
+        (EventReminder(event_id=event_id, user_id=user_id, kind="post", scheduled_for=ends_at + POST_EVENT_DELAY)
+         for event_id, user_id, ends_at in rows),
+        ignore_conflicts=True,
+        batch_size=1000,
+    )
 
-        if not r.sent_at and r.scheduled_for <= now:
-            send_event_reminder.delay(r.id)
-            created += 1
+    post = EventReminder.objects.filter(kind="post", scheduled_for__gte=now - POST_EVENT_LOOKBACK)
+    schedule_delivery(post.filter(scheduled_for__gt=now))
+    dispatch(post.filter(scheduled_for__lte=now))
 
-    return created
\ No newline at end of file
+    return len(created)
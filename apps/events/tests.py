@@ -1,3 +1,53 @@
+from datetime import timedelta
+from unittest import mock
+
 from django.test import TestCase
+from django.utils import timezone
+
+from apps.events.models import Event, EventReminder
+from apps.events.tasks import REMINDER_QUEUED_TIMEOUT, scan_and_schedule_reminders
+from apps.users.models import User
+
+
+class ReminderSweepTests(TestCase):
+
+    def setUp(self):
+        self.now = timezone.now()
+        user = User.objects.create_user("student", "student@example.com", "secret")
+        start = self.now + timedelta(hours=2)
+        event = Event.objects.create(
+            title="Evento", place="Aula", id_creator=user, timezone="UTC",
+            start_date=start.date(), start_time=start.time(), end_date=start.date(), end_time=start.time(),
+        )
+        # Queued at its instant, but the task never ran
+        self.reminder = EventReminder.objects.create(
+            event=event, user=user, kind="pre", scheduled_for=self.now,
+            status=EventReminder.STATUS_QUEUED, queued_at=self.now,
+        )
+
+    def sweep_at(self, now):
+        with mock.patch("django.utils.timezone.now", return_value=now), \
+                mock.patch("apps.events.tasks.send_due_reminders.apply_async") as apply_async, \
+                self.captureOnCommitCallbacks(execute=True):
+            dispatched = scan_and_schedule_reminders()
+        return dispatched, apply_async
+
+    def test_lost_queued_reminder_is_dispatched_again(self):
+        dispatched, apply_async = self.sweep_at(self.now + timedelta(minutes=5))
+        self.assertEqual(dispatched, 0)
+        apply_async.assert_not_called()
+
+        later = self.now + REMINDER_QUEUED_TIMEOUT + timedelta(minutes=1)
+        dispatched, apply_async = self.sweep_at(later)
+        self.assertEqual(dispatched, 1)
+        apply_async.assert_called_once()
+        self.assertEqual(apply_async.call_args.kwargs["kwargs"]["reminder_ids"], [self.reminder.pk])
+
+        self.reminder.refresh_from_db()
+        self.assertEqual(self.reminder.status, EventReminder.STATUS_QUEUED)
+        self.assertEqual(self.reminder.queued_at, later)
 
-# Create your tests here.
+    def test_lost_reminder_of_started_event_is_not_dispatched(self):
+        dispatched, apply_async = self.sweep_at(self.now + timedelta(hours=3))
+        self.assertEqual(dispatched, 0)
+        apply_async.assert_not_called()
@@ -1,23 +1,63 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import DateTimeField, DurationField, ExpressionWrapper, F, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
-def combine(dt_date, dt_time):
+DEFAULT_HOURS_BEFORE = 24
+
+CATEGORIES_VERSION_KEY = "events:categories:version"
+EVENTS_VERSION_KEY = "events:version"
+
+# Process-local (version, {id: Category}), replaced whole when the categories version changes
+_category_catalogue = (None, {})
+
+
+def default_event_timezone():
+    """
+    Timezone of the events created without an explicit one.
+    """
+    return settings.EVENTS_DEFAULT_TIMEZONE
+
+
+def is_valid_timezone(name):
+    """
+    Whether name is an IANA timezone known to the system.
+    """
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+    return True
+
+
+def combine(dt_date, dt_time, tz=None):
     """
-    Combine date and time into an aware datetime object.
+    Combine date and time, as wall-clock time in the timezone tz (IANA name,
+    defaults to EVENTS_DEFAULT_TIMEZONE), into an aware datetime in UTC.
     """
     if dt_date is None or dt_time is None:
         return None
-    naive = datetime.combine(dt_date, dt_time)
-    return timezone.make_aware(naive)
+    local = datetime.combine(dt_date, dt_time, tzinfo=ZoneInfo(tz or default_event_timezone()))
+    return local.astimezone(ZoneInfo("UTC"))
 
 
 def compute_status(event):
     """
     Compute the status of an event: finished, ongoing, or upcoming.
+    Uses the instants stored on the event, computed once when it is saved.
     """
     now = timezone.now()
-    start = combine(event.start_date, event.start_time)
-    end = combine(event.end_date, event.end_time)
+    start = event.starts_at
+    end = event.ends_at
+    if start is None and end is None:
+        start = combine(event.start_date, event.start_time, event.timezone)
+        end = combine(event.end_date, event.end_time, event.timezone)
 
     is_finished = bool(end and now > end)
     is_ongoing = bool(start and end and start <= now <= end)
@@ -29,5 +69,82 @@ def reminder_datetime(event, user):
     """
     Compute the reminder datetime for an event based on user preferences.
     """
-    hours = getattr(getattr(user, "notif_prefs", None), "hours_before", 24)
-    return combine(event.start_date, event.start_time) - timedelta(hours=hours)
\ No newline at end of file
+    hours = getattr(getattr(user, "notif_prefs", None), "hours_before", DEFAULT_HOURS_BEFORE)
+    return event.starts_at - timedelta(hours=hours)
+
+
+def reminder_instant_expression(event="event", user="student"):
+    """
+    SQL counterpart of reminder_datetime: the event start minus the hours_before
+    of the user, computed by the database for every row of the queryset.
+    """
+    start = F(f"{event}__starts_at")
+    hours = Coalesce(F(f"{user}__notif_prefs__hours_before"), Value(DEFAULT_HOURS_BEFORE))
+    offset = ExpressionWrapper(Value(timedelta(hours=1)) * hours, output_field=DurationField())
+    return ExpressionWrapper(start - offset, output_field=DateTimeField())
+
+def categories_version():
+    """
+    Timestamp of the last change to the categories, shared through the cache.
+    """
+    return cache.get_or_set(CATEGORIES_VERSION_KEY, time.time, None)
+
+
+def bump_categories_version():
+    cache.set(CATEGORIES_VERSION_KEY, time.time(), None)
+
+
+def cached_categories():
+    """
+    {id: Category} of every category, in the default ordering. Kept in the
+    process and reloaded only when the categories version changes, so reads
+    cost one cache lookup instead of a query.
+    """
+    global _category_catalogue
+    version = categories_version()
+    cached_version, by_id = _category_catalogue
+    if cached_version != version:
+        from apps.events.models import Category
+
+        # The version is read before loading: a change meanwhile triggers another reload
+        by_id = {category.pk: category for category in Category.objects.all()}
+        _category_catalogue = (version, by_id)
+    return by_id
+
+
+def events_version():
+    """
+    Timestamp of the last write to any event, shared through the cache.
+    """
+    return cache.get_or_set(EVENTS_VERSION_KEY, time.time, None)
+
+
+def bump_events_version():
+    cache.set(EVENTS_VERSION_KEY, time.time(), None)
+
+
+def touch_events(event_ids):
+    """
+    Refresh updated_at of the events, whose payload changed without saving
+    them (enrollments, renditions), and the events version after commit.
+    """
+    from apps.events.models import Event
+
+    Event.objects.filter(pk__in=event_ids).update(updated_at=timezone.now())
+    transaction.on_commit(bump_events_version)
+
+
+def payload_etag(*stamps):
+    """
+    ETag of a payload identified by the given version stamps.
+    """
+    return hashlib.md5(repr(stamps).encode()).hexdigest()
+
+
+def status_changed_at(starts_at, ends_at, now=None):
+    """
+    Last instant at which compute_status changed for an event (its start or
+    end, once passed), or None while it is upcoming.
+    """
+    now = now or timezone.now()
+    return max((t for t in (starts_at, ends_at) if t and t <= now), default=None)
@@ -0,0 +1,12 @@
+from django.contrib import admin
+from apps.mail.models import OutboundEmail
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ['id', 'to', 'subject', 'priority', 'status', 'attempts', 'created_at', 'sent_at']
+    list_filter = ['status', 'priority']
+    search_fields = ['to', 'subject']
+    # The bodies can hold one-time codes and verification or reset links
+    exclude = ['body', 'html_body']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
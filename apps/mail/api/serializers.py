@@ -0,0 +1,19 @@
+from rest_framework import serializers
+
+
+class LocalDrainerStatsSerializer(serializers.Serializer):
+    workers = serializers.IntegerField()
+    active = serializers.IntegerField()
+    triggers = serializers.IntegerField()
+    coalesced = serializers.IntegerField()
+
+
+class OutboxStatsSerializer(serializers.Serializer):
+    """
+    Serializer for the queue depth of the outbox.
+    """
+    pending_critical = serializers.IntegerField()
+    pending_bulk = serializers.IntegerField()
+    failed = serializers.IntegerField()
+    oldest_pending_seconds = serializers.IntegerField()
+    local_drainer = LocalDrainerStatsSerializer(allow_null=True)
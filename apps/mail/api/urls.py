@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import OutboxStatsView
+
+urlpatterns = [
+    path("mail/outbox/stats/", OutboxStatsView.as_view(), name="mail-outbox-stats"),
+]
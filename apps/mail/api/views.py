@@ -0,0 +1,19 @@
+from drf_spectacular.utils import extend_schema
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.mail.api.serializers import OutboxStatsSerializer
+from apps.mail.utils import outbox_stats
+from apps.users.permissions import IsInAdministratorGroup
+
+
+@extend_schema(tags=['mail'], responses=OutboxStatsSerializer)
+class OutboxStatsView(APIView):
+    """
+    Queue depth of the email outbox. Only for administrators.
+    """
+    permission_classes = [IsInAdministratorGroup]
+
+    def get(self, request):
+        return Response(OutboxStatsSerializer(outbox_stats()).data, status=status.HTTP_200_OK)
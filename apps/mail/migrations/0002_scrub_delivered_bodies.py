@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:40
+
+from django.db import migrations
+
+
+def scrub_delivered_bodies(apps, schema_editor):
+    """
+    Drop the bodies of the emails already sent or failed for good.
+    """
+    OutboundEmail = apps.get_model('mail', 'OutboundEmail')
+    OutboundEmail.objects.exclude(status='pending').update(body='', html_body='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mail', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(scrub_delivered_bodies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.template import Context, TemplateDoesNotExist
+from django.template.loader import select_template
+
+from apps.mail.models import OutboundEmail
+
+
+@lru_cache(maxsize=256)
+def _template(name, part, locale):
+    """
+    Compiled template of one part (subject.txt, txt or html) of an email, for the
+    locale or the default locale. Compiled once per process and reused for every
+    email, so rendering thousands of reminders only pays the render itself.
+    Returns None when the part does not exist (e.g. no HTML version).
+    """
+    candidates = [f"mail/{locale}/{name}.{part}"]
+    if locale != settings.MAIL_DEFAULT_LOCALE:
+        candidates.append(f"mail/{settings.MAIL_DEFAULT_LOCALE}/{name}.{part}")
+    try:
+        return select_template(candidates).template
+    except TemplateDoesNotExist:
+        if part == "html":
+            return None
+        raise
+
+
+def normalize_locale(locale):
+    """
+    Map a language code (es, es-CO, en-us...) to one of MAIL_LOCALES.
+    """
+    code = (locale or "").split("-")[0].split("_")[0].lower()
+    return code if code in settings.MAIL_LOCALES else settings.MAIL_DEFAULT_LOCALE
+
+
+def request_locale(request):
+    """
+    Preferred mail locale of the client, from its Accept-Language header.
+    """
+    header = request.META.get("HTTP_ACCEPT_LANGUAGE", "") if request else ""
+    for lang in header.split(","):
+        code = lang.split(";")[0].strip().split("-")[0].lower()
+        if code in settings.MAIL_LOCALES:
+            return code
+    return settings.MAIL_DEFAULT_LOCALE
+
+
+def render_email(name, context, locale=None):
+    """
+    Render the subject, plain text body and HTML body of the email `name`.
+    Subject and text are rendered without autoescaping; the HTML part is escaped.
+    """
+    locale = normalize_locale(locale)
+    context = {**context, "locale": locale}
+
+    subject = _template(name, "subject.txt", locale).render(Context(context, autoescape=False))
+    body = _template(name, "txt", locale).render(Context(context, autoescape=False))
+    html = _template(name, "html", locale)
+    html_body = html.render(Context(context)) if html else ""
+
+    return " ".join(subject.split()), body.strip(), html_body
+
+
+def templated_email(name, context, to, locale=None, priority=OutboundEmail.PRIORITY_BULK, from_email=None):
+    """
+    Build an unsaved OutboundEmail (multipart when the template has an HTML part),
+    ready for enqueue_emails.
+    """
+    subject, body, html_body = render_email(name, context, locale)
+    return OutboundEmail(
+        to=to,
+        subject=subject,
+        body=body,
+        html_body=html_body,
+        from_email=from_email or "",
+        priority=priority,
+    )
@@ -0,0 +1,124 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+
+def _backoff(attempts):
+    """
+    Exponential backoff between delivery attempts, capped at one hour.
+    """
+    return timedelta(seconds=min(settings.MAIL_OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1), 3600))
+
+
+def _scrub(email):
+    """
+    Drop the bodies of an email that will not be sent again: they can hold
+    one-time codes and verification or reset links.
+    """
+    email.body = ''
+    email.html_body = ''
+
+
+def _mark_failed(email, exc, now):
+    email.attempts += 1
+    email.last_error = str(exc)[:1000]
+    if email.attempts >= settings.MAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = OutboundEmail.STATUS_FAILED
+        _scrub(email)
+    else:
+        email.next_attempt_at = now + _backoff(email.attempts)
+
+
+@shared_task
+def drain_outbox(batch_size=None, max_priority=None):
+    """
+    Claim up to batch_size pending emails (most urgent first), send them over a
+    single SMTP connection and record the outcome in one bulk update. Failed
+    deliveries are retried with exponential backoff up to MAIL_OUTBOX_MAX_ATTEMPTS.
+    Rows locked by another worker are skipped, so drains can run concurrently.
+    With max_priority, only the emails at least that urgent are claimed.
+    """
+    batch_size = batch_size or settings.MAIL_OUTBOX_BATCH_SIZE
+    now = timezone.now()
+
+    pending = OutboundEmail.objects.filter(status=OutboundEmail.STATUS_PENDING, next_attempt_at__lte=now)
+    if max_priority is not None:
+        pending = pending.filter(priority__lte=max_priority)
+
+    with transaction.atomic():
+        batch = list(
+            pending
+            .select_for_update(skip_locked=True)
+            .order_by('priority', 'next_attempt_at')[:batch_size]
+        )
+        if not batch:
+            return 0
+
+        sent = 0
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as exc:
+            for email in batch:
+                _mark_failed(email, exc, now)
+        else:
+            try:
+                for email in batch:
+                    try:
+                        connection.send_messages([email.to_message(connection)])
+                    except Exception as exc:
+                        _mark_failed(email, exc, now)
+                    else:
+                        email.status = OutboundEmail.STATUS_SENT
+                        email.sent_at = timezone.now()
+                        _scrub(email)
+                        sent += 1
+            finally:
+                connection.close()
+
+        OutboundEmail.objects.bulk_update(
+            batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at', 'body', 'html_body']
+        )
+
+    return sent
+
+
+@shared_task
+def drain_critical_outbox(batch_size=None):
+    """
+    Drain only the critical emails (verification, OTP). Routed to the
+    mail-critical queue, so it never waits behind bulk reminder mail.
+    """
+    return drain_outbox(batch_size, max_priority=OutboundEmail.PRIORITY_CRITICAL)
+
+
+@shared_task
+def prune_outbox(batch_size=1000, max_batches=50):
+    """
+    Delete the sent emails older than MAIL_OUTBOX_RETENTION_DAYS and the failed
+    ones older than MAIL_OUTBOX_FAILED_RETENTION_DAYS in bounded batches.
+    """
+    now = timezone.now()
+    expired = (
+        Q(status=OutboundEmail.STATUS_SENT, created_at__lt=now - timedelta(days=settings.MAIL_OUTBOX_RETENTION_DAYS))
+        | Q(status=OutboundEmail.STATUS_FAILED, created_at__lt=now - timedelta(days=settings.MAIL_OUTBOX_FAILED_RETENTION_DAYS))
+    )
+    deleted = 0
+    for _ in range(max_batches):
+        ids = list(
+            OutboundEmail.objects
+            .filter(expired)
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        OutboundEmail.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+    return deleted
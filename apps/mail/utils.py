@@ -0,0 +1,126 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from math import ceil
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from apps.mail.models import OutboundEmail
+
+
+def enqueue_emails(emails):
+    """
+    Store unsaved OutboundEmail rows in the outbox within the current transaction.
+    The drain task is triggered once the transaction commits, so nothing is sent
+    if it rolls back and nothing is lost if the process dies after the commit.
+    """
+    emails = OutboundEmail.objects.bulk_create(emails, batch_size=500)
+    if emails:
+        critical = sum(e.priority <= OutboundEmail.PRIORITY_CRITICAL for e in emails)
+        batches = ceil((len(emails) - critical) / settings.MAIL_OUTBOX_BATCH_SIZE)
+        transaction.on_commit(lambda: _trigger_drain(batches, critical=bool(critical)))
+    return emails
+
+
+class LocalDrainer:
+    """
+    Bounded stand-in for the Celery worker when tasks run eagerly, so a request
+    never waits on SMTP. At most `workers` threads drain the outbox, and triggers
+    arriving while they are busy only flag that there is more work: they never
+    queue threads, so a burst of signups cannot pile up threads or DB connections.
+    """
+    def __init__(self, workers):
+        self.workers = workers
+        self.active = 0
+        self.triggers = 0
+        self.coalesced = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="outbox")
+
+    def trigger(self):
+        with self._lock:
+            self.triggers += 1
+            self._dirty = True
+            if self.active >= self.workers:
+                self.coalesced += 1
+                return False
+            self.active += 1
+        self._pool.submit(self._run)
+        return True
+
+    def _run(self):
+        from apps.mail.tasks import drain_outbox
+
+        close_old_connections()
+        try:
+            while True:
+                with self._lock:
+                    self._dirty = False
+                while drain_outbox.run():
+                    pass
+                with self._lock:
+                    if not self._dirty:
+                        self.active -= 1
+                        return
+        except Exception:
+            with self._lock:
+                self.active -= 1
+            raise
+        finally:
+            connection.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "active": self.active,
+                "triggers": self.triggers,
+                "coalesced": self.coalesced,
+            }
+
+
+_local_drainer = None
+_local_drainer_lock = threading.Lock()
+
+
+def get_local_drainer():
+    global _local_drainer
+    if _local_drainer is None:
+        with _local_drainer_lock:
+            if _local_drainer is None:
+                _local_drainer = LocalDrainer(settings.MAIL_LOCAL_DRAIN_WORKERS)
+    return _local_drainer
+
+
+def _trigger_drain(batches, critical=False):
+    from apps.mail.tasks import drain_critical_outbox, drain_outbox
+
+    if settings.CELERY_TASK_ALWAYS_EAGER:
+        get_local_drainer().trigger()
+        return
+    if critical:
+        drain_critical_outbox.apply_async(priority=0)
+    for _ in range(batches):
+        drain_outbox.delay()
+
+
+def outbox_stats():
+    """
+    Queue depth of the outbox: pending emails per priority, failed emails and the
+    age of the oldest pending one, plus the local drainer counters when eager.
+    """
+    now = timezone.now()
+    pending = Q(status=OutboundEmail.STATUS_PENDING)
+    stats = OutboundEmail.objects.aggregate(
+        pending_critical=Count("id", filter=pending & Q(priority=OutboundEmail.PRIORITY_CRITICAL)),
+        pending_bulk=Count("id", filter=pending & Q(priority=OutboundEmail.PRIORITY_BULK)),
+        failed=Count("id", filter=Q(status=OutboundEmail.STATUS_FAILED)),
+        oldest_pending=Min("created_at", filter=pending),
+    )
+    oldest = stats.pop("oldest_pending")
+    stats["oldest_pending_seconds"] = int((now - oldest).total_seconds()) if oldest else 0
+    stats["local_drainer"] = get_local_drainer().stats() if settings.CELERY_TASK_ALWAYS_EAGER else None
+    return stats
@@ -0,0 +1,14 @@
+from rest_framework import serializers
+
+from apps.media.resolver import media_urls
+
+
+class MediaImageField(serializers.ImageField):
+    """
+    ImageField whose URL comes from the MediaURLResolver of the request.
+    """
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        return media_urls(self.context.get("request")).url(value)
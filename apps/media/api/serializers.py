@@ -0,0 +1,41 @@
+from rest_framework import serializers
+
+from apps.media.uploads import CONTENT_TYPES, UPLOAD_TARGETS, max_upload_size
+
+
+class UploadRequestSerializer(serializers.Serializer):
+    """
+    Serializer to request an upload target for an image.
+    """
+    target = serializers.ChoiceField(choices=list(UPLOAD_TARGETS))
+    content_type = serializers.ChoiceField(choices=list(CONTENT_TYPES))
+    size = serializers.IntegerField(min_value=1, help_text="Tamaño del archivo en bytes")
+    event = serializers.IntegerField(required=False, help_text="Evento de la portada (solo para cover_image)")
+
+    def validate(self, data):
+        max_size = max_upload_size(data["target"])
+        if data["size"] > max_size:
+            raise serializers.ValidationError({"size": f"La imagen no puede superar {max_size // (1024 * 1024)} MB."})
+        if data["target"] == "cover_image" and data.get("event") is None:
+            raise serializers.ValidationError({"event": "Este campo es requerido para la portada."})
+        return data
+
+
+class UploadTargetSerializer(serializers.Serializer):
+    """
+    Where and how to upload the file, and the token to finalize it.
+    """
+    token = serializers.CharField()
+    key = serializers.CharField()
+    url = serializers.URLField()
+    method = serializers.CharField()
+    fields = serializers.DictField(child=serializers.CharField())
+    file_field = serializers.CharField()
+    expires_in = serializers.IntegerField()
+
+
+class UploadFinalizeSerializer(serializers.Serializer):
+    """
+    Serializer to attach an uploaded image.
+    """
+    token = serializers.CharField()
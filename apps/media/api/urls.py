@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import LocalUploadView, UploadFinalizeView, UploadRequestView
+
+urlpatterns = [
+    path("media/uploads/", UploadRequestView.as_view(), name="media-upload"),
+    path("media/uploads/finalize/", UploadFinalizeView.as_view(), name="media-upload-finalize"),
+    path("media/uploads/local/<str:token>/", LocalUploadView.as_view(), name="media-upload-local"),
+]
@@ -0,0 +1,163 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import transaction
+from django.urls import reverse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework import status
+from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.events.models import Event
+from apps.media.api.serializers import UploadFinalizeSerializer, UploadRequestSerializer, UploadTargetSerializer
+from apps.media.uploads import (
+    UPLOAD_TARGETS,
+    InvalidUpload,
+    is_direct,
+    make_upload_token,
+    max_upload_size,
+    presign_upload,
+    read_upload_token,
+    target_storage,
+    upload_key,
+    verify_upload,
+)
+from apps.media.utils import delete_media_later, rendition_urls, replace_image
+from apps.users.permissions import is_admin
+from apps.users.utils import absolute_media_url
+
+User = get_user_model()
+
+
+def get_upload_instance(request, target, object_id):
+    """
+    Object whose image is uploaded: the user itself, or an event the user can modify.
+    """
+    if target == "profile_photo":
+        return request.user
+    event = Event.objects.filter(pk=object_id, is_active=True).first()
+    if event is None:
+        raise NotFound("Evento no encontrado.")
+    if not (event.id_creator_id == request.user.id or is_admin(request)):
+        raise PermissionDenied("No tiene permiso para modificar este evento.")
+    return event
+
+
+@extend_schema(tags=["media"], request=UploadRequestSerializer, responses=UploadTargetSerializer)
+class UploadRequestView(APIView):
+    """
+    Issue an upload target for a profile photo or an event cover. With S3
+    the file goes straight to the bucket through a presigned POST; then the
+    client calls the finalize endpoint with the token.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        ser = UploadRequestSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        data = ser.validated_data
+        target = data["target"]
+        conf = UPLOAD_TARGETS[target]
+
+        if target == "profile_photo":
+            # Only the pk is needed to build the key; do not load the user
+            instance = User(pk=request.user.pk)
+        else:
+            instance = get_upload_instance(request, target, data["event"])
+        key = upload_key(instance, conf["field"], data["content_type"])
+        token = make_upload_token(request.user.pk, target, key, data["content_type"], data.get("event"))
+
+        storage = target_storage(target)
+        if is_direct(storage):
+            post = presign_upload(storage, key, data["content_type"], max_upload_size(target))
+            url, fields = post["url"], post["fields"]
+        else:
+            url = request.build_absolute_uri(reverse("media-upload-local", args=[token]))
+            fields = {}
+
+        payload = {
+            "token": token,
+            "key": key,
+            "url": url,
+            "method": "POST",
+            "fields": fields,
+            "file_field": "file",
+            "expires_in": settings.MEDIA_UPLOAD_EXPIRES,
+        }
+        return Response(UploadTargetSerializer(payload).data, status=status.HTTP_201_CREATED)
+
+
+@extend_schema(tags=["media"], request=UploadFinalizeSerializer, responses=OpenApiTypes.OBJECT)
+class UploadFinalizeView(APIView):
+    """
+    Validate an uploaded image (size and type) and attach it to the profile
+    photo or the event cover. Renditions are generated in the background.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        ser = UploadFinalizeSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        try:
+            upload = read_upload_token(ser.validated_data["token"], settings.MEDIA_UPLOAD_TOKEN_MAX_AGE)
+        except signing.BadSignature:
+            return Response({"detail": "Token de subida inválido o expirado."}, status=status.HTTP_400_BAD_REQUEST)
+        if upload["u"] != request.user.pk:
+            raise PermissionDenied("La subida pertenece a otro usuario.")
+
+        conf = UPLOAD_TARGETS[upload["t"]]
+        field = conf["field"]
+        key = upload["k"]
+        with transaction.atomic():
+            instance = get_upload_instance(request, upload["t"], upload["o"])
+            # Finalizing twice is a no-op
+            if getattr(instance, field).name != key:
+                storage = target_storage(upload["t"])
+                try:
+                    verify_upload(storage, key, upload["ct"], max_upload_size(upload["t"]))
+                except InvalidUpload as exc:
+                    delete_media_later([key])
+                    return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+                replace_image(instance, field, key, conf["preset"])
+
+        return Response({
+            field: absolute_media_url(request, getattr(instance, field)),
+            f"{field}_renditions": rendition_urls(getattr(instance, f"{field}_renditions"), request),
+        }, status=status.HTTP_200_OK)
+
+
+@extend_schema(exclude=True)
+class LocalUploadView(APIView):
+    """
+    Stand-in for the bucket when media is stored on the local filesystem
+    (development and tests). The token in the URL authorizes the upload.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, token):
+        try:
+            upload = read_upload_token(token, settings.MEDIA_UPLOAD_EXPIRES)
+        except signing.BadSignature:
+            return Response({"detail": "Token de subida inválido o expirado."}, status=status.HTTP_403_FORBIDDEN)
+
+        storage = target_storage(upload["t"])
+        if is_direct(storage):
+            raise NotFound()
+
+        file = request.FILES.get("file")
+        if file is None:
+            return Response({"file": ["Este campo es requerido."]}, status=status.HTTP_400_BAD_REQUEST)
+        max_size = max_upload_size(upload["t"])
+        if file.size > max_size:
+            return Response({"detail": f"La imagen no puede superar {max_size // (1024 * 1024)} MB."}, status=status.HTTP_400_BAD_REQUEST)
+        if storage.exists(upload["k"]):
+            return Response({"detail": "El archivo ya fue subido."}, status=status.HTTP_409_CONFLICT)
+
+        storage.save(upload["k"], file)
+        return Response(status=status.HTTP_204_NO_CONTENT)
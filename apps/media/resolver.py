@@ -0,0 +1,101 @@
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.encoding import filepath_to_uri
+
+# Name whose URL reveals how the storage builds URLs (base + quoted name)
+_PROBE = "__media_probe__"
+
+
+def _signature_window():
+    """
+    Current slot of half the signed URL lifetime. A signed URL is reused
+    while its slot lasts, so it is always served with at least half of its
+    lifetime left.
+    """
+    expire = getattr(default_storage, "querystring_expire", 3600)
+    return int(time.time() // max(expire // 2, 1))
+
+
+@lru_cache(maxsize=settings.MEDIA_SIGNED_URL_CACHE_SIZE)
+def _signed_url(name, window):
+    return default_storage.url(name)
+
+
+def storage_base_url():
+    """
+    Prefix of the URL of every object of the default storage, or None when
+    the URLs are signed per object (S3 querystring auth or CloudFront signer).
+    With AWS_S3_CUSTOM_DOMAIN this is https://<domain>/<location>.
+    """
+    url = default_storage.url(_PROBE)
+    if "?" in url or not url.endswith(_PROBE):
+        return None
+    return url[: -len(_PROBE)]
+
+
+class MediaURLResolver:
+    """
+    Media URLs for one request. The base URL is computed (and made absolute)
+    once; object URLs are the base plus the quoted name. Signed URLs go
+    through an LRU instead.
+    """
+
+    def __init__(self, request=None):
+        base = storage_base_url()
+        if base is not None and request is not None and not base.startswith(("http://", "https://")):
+            base = request.build_absolute_uri(base)
+        self.base_url = base
+        self.request = request
+
+    @property
+    def stamp(self):
+        """
+        Version stamp of the URLs for ETags: the signature window when they are
+        signed (so cached payloads do not outlive them), None otherwise.
+        """
+        return None if self.base_url is not None else _signature_window()
+
+    def url(self, file):
+        """
+        URL of a FieldFile or storage name, or None when empty.
+        """
+        name = getattr(file, "name", file)
+        if not name:
+            return None
+        if self.base_url is not None:
+            return self.base_url + filepath_to_uri(name).lstrip("/")
+        url = _signed_url(name, _signature_window())
+        if self.request is not None and not url.startswith(("http://", "https://")):
+            url = self.request.build_absolute_uri(url)
+        return url
+
+    def renditions(self, renditions):
+        """
+        URLs of a renditions dict, with the same shape.
+        """
+        return {
+            rendition: {ext: self.url(name) for ext, name in formats.items()}
+            for rendition, formats in (renditions or {}).items()
+        }
+
+    def thumbnail(self, renditions, ext="webp"):
+        """
+        URL of the thumbnail rendition, or None while it is not generated.
+        """
+        name = (renditions or {}).get("thumbnail", {}).get(ext)
+        return self.url(name)
+
+
+def media_urls(request=None):
+    """
+    MediaURLResolver of the request, created on first use.
+    """
+    if request is None:
+        return MediaURLResolver()
+    resolver = getattr(request, "_media_urls", None)
+    if resolver is None:
+        resolver = request._media_urls = MediaURLResolver(request)
+    return resolver
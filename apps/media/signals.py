@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent by process_image once the renditions of <sender>.<field> are recorded
+# (with a queryset update, so post_save is not sent). Arguments: pk, field.
+renditions_ready = Signal()
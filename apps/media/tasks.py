@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+
+from .signals import renditions_ready
+from .utils import MEDIA_FIELDS, delete_names, delete_renditions, generate_renditions, iter_storage_names, rendition_names
+
+
+@shared_task(bind=True, max_retries=3, retry_backoff=True)
+def process_image(self, model, pk, field, name, preset):
+    """
+    Generate the renditions of <model>.<field> and record them in
+    <field>_renditions, unless the image was replaced or removed meanwhile.
+    """
+    Model = apps.get_model(model)
+    obj = Model.objects.filter(pk=pk).only(field).first()
+    if obj is None or getattr(obj, field).name != name:
+        return "stale"
+
+    try:
+        renditions = generate_renditions(getattr(obj, field), preset)
+    except (UnidentifiedImageError, Image.DecompressionBombError):
+        return "invalid"
+    except OSError as exc:
+        # Storage hiccup: try again later
+        raise self.retry(exc=exc)
+
+    if not Model.objects.filter(pk=pk, **{field: name}).update(**{f"{field}_renditions": renditions}):
+        delete_renditions(renditions, getattr(obj, field).storage)
+        return "stale"
+    renditions_ready.send(sender=Model, pk=pk, field=field)
+    return "done"
+
+
+@shared_task(bind=True, max_retries=5, retry_backoff=True)
+def delete_media(self, names):
+    """
+    Delete media that is no longer referenced (queued after commit by
+    apps.media.utils.delete_media_later).
+    """
+    try:
+        delete_names(default_storage, names)
+    except Exception as exc:
+        raise self.retry(exc=exc)
+    return len(names)
+
+
+def referenced_names(model, field):
+    """
+    Storage names referenced by <model>.<field> and its renditions.
+    """
+    Model = apps.get_model(model)
+    names = set()
+    rows = (
+        Model.objects
+        .exclude(**{f"{field}__isnull": True})
+        .exclude(**{field: ""})
+        .values_list(field, f"{field}_renditions")
+        .iterator(chunk_size=2000)
+    )
+    for name, renditions in rows:
+        names.add(name)
+        names.update(rendition_names(renditions))
+    return names
+
+
+@shared_task
+def sweep_orphaned_media(batch_size=1000):
+    """
+    Delete the objects under the media prefixes that no row references: leaked
+    replacements, uploads that were never finalized, renditions of replaced
+    images. The storage listing is streamed and compared against the names
+    referenced in the database; objects newer than MEDIA_ORPHAN_GRACE are
+    kept, since they may belong to an upload or rendition still in progress.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.MEDIA_ORPHAN_GRACE)
+    deleted = 0
+    for prefix, (model, field) in MEDIA_FIELDS.items():
+        referenced = referenced_names(model, field)
+        batch = []
+        for name, modified in iter_storage_names(default_storage, prefix):
+            if name in referenced or modified > cutoff:
+                continue
+            batch.append(name)
+            if len(batch) >= batch_size:
+                delete_names(default_storage, batch)
+                deleted += len(batch)
+                batch = []
+        delete_names(default_storage, batch)
+        deleted += len(batch)
+    return deleted
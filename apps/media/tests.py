@@ -0,0 +1,47 @@
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from apps.media.tasks import process_image
+from apps.users.models import User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    },
+)
+class ProcessImageTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("photo", "photo@example.com", "secret")
+        buffer = BytesIO()
+        Image.new("RGB", (200, 100), "red").save(buffer, "PNG")
+        self.user.profile_photo.save("photo.png", ContentFile(buffer.getvalue()))
+
+    def process(self):
+        return process_image.run("users.User", self.user.pk, "profile_photo", self.user.profile_photo.name, "avatar")
+
+    def test_renditions_are_generated(self):
+        self.assertEqual(self.process(), "done")
+        self.user.refresh_from_db()
+        self.assertIn("thumbnail", self.user.profile_photo_renditions)
+
+    @override_settings(MEDIA_MAX_IMAGE_PIXELS=10_000)
+    def test_image_above_pixel_limit_is_invalid(self):
+        self.assertEqual(self.process(), "invalid")
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.profile_photo_renditions, {})
+
+    def test_decompression_bomb_is_invalid(self):
+        # Pillow refuses to open images above twice MAX_IMAGE_PIXELS
+        with mock.patch.object(Image, "MAX_IMAGE_PIXELS", 5_000):
+            self.assertEqual(self.process(), "invalid")
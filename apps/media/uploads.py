@@ -0,0 +1,125 @@
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.core import signing
+from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
+
+UPLOAD_SALT = "apps.media.upload"
+
+# target -> model, image field, renditions preset and setting with the size limit
+UPLOAD_TARGETS = {
+    "profile_photo": {"model": "users.User", "field": "profile_photo", "preset": "avatar", "max_size": "MEDIA_AVATAR_MAX_SIZE"},
+    "cover_image": {"model": "events.Event", "field": "cover_image", "preset": "cover", "max_size": "MEDIA_COVER_MAX_SIZE"},
+}
+
+CONTENT_TYPES = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+}
+
+
+class InvalidUpload(Exception):
+    """
+    The uploaded object cannot be attached.
+    """
+
+
+def max_upload_size(target):
+    return getattr(settings, UPLOAD_TARGETS[target]["max_size"])
+
+
+def target_storage(target):
+    """
+    Storage of the image field of an upload target.
+    """
+    conf = UPLOAD_TARGETS[target]
+    return apps.get_model(conf["model"])._meta.get_field(conf["field"]).storage
+
+
+def is_direct(storage):
+    """
+    Whether clients upload straight to the storage (S3) instead of through the API.
+    """
+    return isinstance(storage, S3Boto3Storage)
+
+
+def upload_key(instance, field, content_type):
+    """
+    Storage name for a new upload of instance.<field>, following its upload_to.
+    """
+    filename = f"{uuid.uuid4().hex}{CONTENT_TYPES[content_type]}"
+    return instance._meta.get_field(field).generate_filename(instance, filename)
+
+
+def make_upload_token(user_id, target, key, content_type, object_id):
+    return signing.dumps(
+        {"u": user_id, "t": target, "k": key, "ct": content_type, "o": object_id},
+        salt=UPLOAD_SALT,
+    )
+
+
+def read_upload_token(token, max_age):
+    """
+    Payload of an upload token. Raises signing.BadSignature if it was
+    tampered with or is older than max_age seconds.
+    """
+    return signing.loads(token, salt=UPLOAD_SALT, max_age=max_age)
+
+
+def presign_upload(storage, key, content_type, max_size):
+    """
+    URL and form fields of a POST that uploads key to the bucket. S3 itself
+    enforces the content type and the size range.
+    """
+    client = storage.connection.meta.client
+    return client.generate_presigned_post(
+        Bucket=storage.bucket.name,
+        Key=storage._normalize_name(clean_name(key)),
+        Fields={"Content-Type": content_type},
+        Conditions=[
+            {"Content-Type": content_type},
+            ["content-length-range", 1, max_size],
+        ],
+        ExpiresIn=settings.MEDIA_UPLOAD_EXPIRES,
+    )
+
+
+def read_head(storage, name, length=16):
+    """
+    First bytes of a stored file, without downloading the whole object from S3.
+    """
+    if is_direct(storage):
+        obj = storage.bucket.Object(storage._normalize_name(clean_name(name)))
+        return obj.get(Range=f"bytes=0-{length - 1}")["Body"].read()
+    with storage.open(name, "rb") as fh:
+        return fh.read(length)
+
+
+def sniff_content_type(head):
+    """
+    Image type from the magic bytes of a file, or None.
+    """
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def verify_upload(storage, key, content_type, max_size):
+    """
+    Check that the object was uploaded, fits the size limit and really is an
+    image of the declared type. Raises InvalidUpload otherwise.
+    """
+    if not storage.exists(key):
+        raise InvalidUpload("El archivo no se ha subido.")
+    size = storage.size(key)
+    if not size or size > max_size:
+        raise InvalidUpload(f"La imagen no puede superar {max_size // (1024 * 1024)} MB.")
+    if sniff_content_type(read_head(storage, key)) != content_type:
+        raise InvalidUpload("Formatos permitidos: JPG, PNG, WEBP.")
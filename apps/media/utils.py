@@ -0,0 +1,194 @@
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+from storages.utils import clean_name
+
+from apps.media.resolver import media_urls
+from apps.media.uploads import is_direct
+
+# Storage prefix of each image field with renditions (used by the orphan sweeper)
+MEDIA_FIELDS = {
+    "avatars/": ("users.User", "profile_photo"),
+    "events/covers/": ("events.Event", "cover_image"),
+}
+
+# S3 DeleteObjects accepts at most 1000 keys per request
+DELETE_BATCH_SIZE = 1000
+
+# Output formats of every rendition: WebP for the clients that support it, JPEG as fallback
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def rendition_name(name, rendition, ext):
+    """
+    Storage name of a rendition: renditions/ next to the original.
+    """
+    path = PurePosixPath(name)
+    return str(path.parent / "renditions" / f"{path.stem}_{rendition}.{ext}")
+
+
+def _flatten(image):
+    """
+    RGB copy of the image, with transparency composed over white (JPEG has no alpha).
+    """
+    if image.mode == "RGB":
+        return image
+    background = Image.new("RGB", image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel("A") if "A" in image.getbands() else None)
+    return background
+
+
+def generate_renditions(field_file, preset):
+    """
+    Generate the renditions of the image of field_file listed in
+    MEDIA_RENDITIONS[preset], in every FORMATS, and store them next to it.
+    Orientation is applied from EXIF and all metadata (EXIF, GPS, ICC) is
+    dropped. Returns {rendition: {format: storage name}}. Raises
+    Image.DecompressionBombError, before decoding, for images larger than
+    MEDIA_MAX_IMAGE_PIXELS.
+    """
+    storage = field_file.storage
+    with storage.open(field_file.name, "rb") as fh:
+        image = Image.open(fh)
+        width, height = image.size
+        if width * height > settings.MEDIA_MAX_IMAGE_PIXELS:
+            raise Image.DecompressionBombError(f"Image of {width}x{height} pixels exceeds MEDIA_MAX_IMAGE_PIXELS")
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    image = image.convert("RGBA" if "A" in image.getbands() or image.mode == "P" else "RGB")
+
+    renditions = {}
+    for rendition, (width, height, crop) in settings.MEDIA_RENDITIONS[preset].items():
+        if crop:
+            resized = ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+        else:
+            resized = image.copy()
+            resized.thumbnail((width, height), Image.Resampling.LANCZOS)
+
+        renditions[rendition] = {}
+        for ext, (fmt, options) in FORMATS.items():
+            buffer = BytesIO()
+            (resized if fmt == "WEBP" else _flatten(resized)).save(buffer, fmt, **options)
+            name = storage.save(rendition_name(field_file.name, rendition, ext), ContentFile(buffer.getvalue()))
+            renditions[rendition][ext] = name
+    return renditions
+
+
+def rendition_names(renditions):
+    """
+    Flat list of the storage names of a renditions dict.
+    """
+    return [name for formats in (renditions or {}).values() for name in formats.values()]
+
+
+def delete_renditions(renditions, storage):
+    """
+    Best-effort removal of the files of a renditions dict.
+    """
+    for name in rendition_names(renditions):
+        try:
+            storage.delete(name)
+        except Exception:
+            pass
+
+
+def delete_names(storage, names):
+    """
+    Delete the given storage names, with one S3 request per 1000 names.
+    """
+    names = [name for name in names if name]
+    if not is_direct(storage):
+        for name in names:
+            storage.delete(name)
+        return
+    for i in range(0, len(names), DELETE_BATCH_SIZE):
+        keys = [{"Key": storage._normalize_name(clean_name(name))} for name in names[i:i + DELETE_BATCH_SIZE]]
+        storage.bucket.delete_objects(Delete={"Objects": keys, "Quiet": True})
+
+
+def delete_media_later(names):
+    """
+    Delete the given storage names in the background once the current
+    transaction commits; nothing is deleted if it rolls back.
+    """
+    from apps.media.tasks import delete_media
+
+    names = [name for name in names if name]
+    if names:
+        transaction.on_commit(lambda: delete_media.delay(names))
+
+
+def iter_storage_names(storage, prefix):
+    """
+    Stream (name, modified time) of every object under prefix. S3 is listed
+    page by page; the local filesystem is walked directory by directory.
+    """
+    if is_direct(storage):
+        location = storage._normalize_name("")
+        for obj in storage.bucket.objects.filter(Prefix=storage._normalize_name(clean_name(prefix))):
+            yield obj.key[len(location):].lstrip("/"), obj.last_modified
+        return
+    pending = [prefix.rstrip("/")]
+    while pending:
+        directory = pending.pop()
+        if not storage.exists(directory):
+            continue
+        dirs, files = storage.listdir(directory)
+        pending.extend(f"{directory}/{d}" for d in dirs)
+        for f in files:
+            name = f"{directory}/{f}"
+            yield name, storage.get_modified_time(name)
+
+
+def schedule_renditions(instance, field, preset):
+    """
+    Generate the renditions of instance.<field> in the background once the
+    current transaction commits. The renditions are recorded in
+    instance.<field>_renditions.
+    """
+    from apps.media.tasks import process_image
+
+    name = getattr(instance, field).name
+    if not name:
+        return
+    label = instance._meta.label
+    transaction.on_commit(lambda: process_image.delay(label, instance.pk, field, name, preset))
+
+
+def replace_image(instance, field, value, preset):
+    """
+    Set instance.<field> to value (a file or a storage name), reset its
+    renditions and schedule new ones. The previous file and its renditions
+    are removed in the background after commit.
+    """
+    old_name = getattr(instance, field).name
+    old_renditions = getattr(instance, f"{field}_renditions")
+
+    setattr(instance, field, value)
+    setattr(instance, f"{field}_renditions", {})
+    instance.save(update_fields=[field, f"{field}_renditions"])
+    schedule_renditions(instance, field, preset)
+
+    if old_name and old_name != getattr(instance, field).name:
+        delete_media_later([old_name, *rendition_names(old_renditions)])
+
+
+def rendition_urls(renditions, request=None):
+    """
+    URLs of a renditions dict, with the same shape.
+    """
+    return media_urls(request).renditions(renditions)
+
+
+def thumbnail_url(renditions, request=None, ext="webp"):
+    """
+    URL of the thumbnail rendition, or None while it is not generated.
+    """
+    return media_urls(request).thumbnail(renditions, ext)
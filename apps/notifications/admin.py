@@ -1,5 +1,5 @@
 from django.contrib import admin
-from apps.notifications.models import Notification, UserNotification
+from apps.notifications.models import Notification, UserNotification, ArchivedNotification
 
 
 @admin.register(Notification)
@@ -12,7 +12,15 @@ class NotificationAdmin(admin.ModelAdmin):
 
 @admin.register(UserNotification)
 class UserNotificationAdmin(admin.ModelAdmin):
-    list_display = ['id', 'user', 'notification', 'read', 'read_at']
+    list_display = ['id', 'user', 'notification', 'read', 'read_at', 'created_at']
     list_filter = ['read', 'notification__type']
     search_fields = ['user__username', 'notification__description']
-    readonly_fields = ['read_at']
\ No newline at end of file
+    readonly_fields = ['read_at', 'created_at']
+
+
+@admin.register(ArchivedNotification)
+class ArchivedNotificationAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'type', 'created_at', 'read_at', 'archived_at']
+    list_filter = ['type']
+    search_fields = ['user__username', 'description']
+    readonly_fields = ['archived_at']
\ No newline at end of file
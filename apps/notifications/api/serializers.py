@@ -15,4 +15,23 @@ class UserNotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserNotification
         fields = ['id', 'notification', 'read', 'read_at']
-        read_only_fields = ['id', 'notification', 'read_at']
\ No newline at end of file
+        read_only_fields = ['id', 'notification', 'read_at']
+
+
+class MarkNotificationsReadSerializer(serializers.Serializer):
+    """
+    Serializer for marking a batch of notifications as read.
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=500
+    )
+
+
+class MarkNotificationsReadResponseSerializer(serializers.Serializer):
+    """
+    Serializer for the result of a bulk read operation.
+    """
+    updated = serializers.IntegerField()
+    unread_count = serializers.IntegerField()
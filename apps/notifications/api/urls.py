@@ -1,7 +1,10 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from apps.notifications.api.views import UserNotificationViewSet
+from apps.notifications.api.views import UserNotificationViewSet, notification_stream
 
 router = DefaultRouter()
 router.register(r'notifications', UserNotificationViewSet, basename='notifications')
 
-urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = [
+    path('notifications/stream/', notification_stream, name='notifications-stream'),
+] + router.urls
\ No newline at end of file
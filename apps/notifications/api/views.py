@@ -1,3 +1,6 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
 from rest_framework import viewsets
 from rest_framework.decorators import action
@@ -5,9 +8,14 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from drf_spectacular.utils import extend_schema
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
 
+from apps.notifications.broker import get_broker, user_channel
+from apps.users.authentication import StatelessJWTAuthentication
 from apps.notifications.models import UserNotification
-from apps.notifications.api.serializers import UserNotificationSerializer
+from apps.notifications.api.serializers import (
+    UserNotificationSerializer, MarkNotificationsReadSerializer, MarkNotificationsReadResponseSerializer
+)
 
 
 @extend_schema(tags=["Notifications"])
@@ -24,8 +32,17 @@ class UserNotificationViewSet(viewsets.ReadOnlyModelViewSet):
         Get notifications for the authenticated user only.
         """
         return UserNotification.objects.filter(
-            user=self.request.user
+            user_id=self.request.user.id
         ).select_related('notification')
+
+    def _mark_unread_as_read(self, queryset):
+        """
+        Mark every unread notification of the queryset as read with a single UPDATE.
+        Returns the number of updated rows and the remaining unread count of the user.
+        """
+        updated = queryset.filter(read=False).update(read=True, read_at=timezone.now())
+        unread_count = UserNotification.objects.filter(user_id=self.request.user.id, read=False).count()
+        return updated, unread_count
     
     @action(detail=True, methods=['patch'], url_path='read')
     def mark_as_read(self, request, pk=None):
@@ -43,7 +60,90 @@ class UserNotificationViewSet(viewsets.ReadOnlyModelViewSet):
         
         user_notification.read = True
         user_notification.read_at = timezone.now()
-        user_notification.save()
+        user_notification.save(update_fields=['read', 'read_at'])
         
         serializer = self.get_serializer(user_notification)
-        return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(request=None, responses=MarkNotificationsReadResponseSerializer)
+    @action(detail=False, methods=['post'], url_path='mark-all-read')
+    def mark_all_read(self, request):
+        """
+        Mark all the unread notifications of the user as read.
+        Endpoint: POST /api/notifications/mark-all-read/
+        """
+        updated, unread_count = self._mark_unread_as_read(
+            UserNotification.objects.filter(user_id=request.user.id)
+        )
+        data = {'updated': updated, 'unread_count': unread_count}
+        return Response(MarkNotificationsReadResponseSerializer(data).data, status=status.HTTP_200_OK)
+
+    @extend_schema(request=MarkNotificationsReadSerializer, responses=MarkNotificationsReadResponseSerializer)
+    @action(detail=False, methods=['post'], url_path='mark-read')
+    def mark_read(self, request):
+        """
+        Mark a list of notifications of the user as read.
+        Endpoint: POST /api/notifications/mark-read/
+        Body: {"ids": [1, 2, 3]}
+        """
+        ser = MarkNotificationsReadSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        updated, unread_count = self._mark_unread_as_read(
+            UserNotification.objects.filter(user_id=request.user.id, id__in=ser.validated_data['ids'])
+        )
+        data = {'updated': updated, 'unread_count': unread_count}
+        return Response(MarkNotificationsReadResponseSerializer(data).data, status=status.HTTP_200_OK)
+
+
+def _authenticate_stream(request):
+    """
+    Authenticate the stream with the JWT access token.
+    EventSource cannot send headers, so the token is also accepted as ?token=.
+    """
+    auth = StatelessJWTAuthentication()
+    header = auth.get_header(request)
+    raw_token = auth.get_raw_token(header) if header else request.GET.get('token')
+    if not raw_token:
+        return None
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+async def _event_stream(user_id):
+    """
+    Relay the messages published on the channel of the user as Server-Sent Events,
+    sending a comment as keep-alive when nothing happens.
+    """
+    subscription = await get_broker().subscribe(user_channel(user_id))
+    try:
+        yield ": connected\n\n"
+        while True:
+            message = await subscription.get(timeout=settings.NOTIFICATIONS_PUSH_HEARTBEAT)
+            if message is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"data: {message}\n\n"
+    finally:
+        await subscription.close()
+
+
+async def notification_stream(request):
+    """
+    Live stream of the notifications and event reminders of the authenticated user.
+    Endpoint: GET /api/notifications/stream/
+    Must be served by the ASGI application (see the "push" service in docker-compose.yml).
+    """
+    user = await sync_to_async(_authenticate_stream)(request)
+    if user is None:
+        return JsonResponse(
+            {'detail': 'Las credenciales de autenticación no se proveyeron o son inválidas.'},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+
+    response = StreamingHttpResponse(_event_stream(user.id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
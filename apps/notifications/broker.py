@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import threading
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def user_channel(user_id):
+    """
+    Name of the pub/sub channel where the pushes of a user are published.
+    """
+    return f"notifications:user:{user_id}"
+
+
+class InMemorySubscription:
+    """
+    Subscription to a channel of the in-process broker.
+    """
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    async def get(self, timeout):
+        """
+        Wait for the next message. Returns None if nothing arrives before the timeout.
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.broker._unsubscribe(self)
+
+
+class InMemoryBroker:
+    """
+    Process-local broker. Only delivers messages published in the same process,
+    so it is meant for tests and single-process development servers.
+    """
+    def __init__(self):
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.queue.put_nowait, message)
+            except RuntimeError:
+                # The event loop of the subscriber is already closed
+                self._unsubscribe(subscription)
+
+    async def subscribe(self, channel):
+        subscription = InMemorySubscription(self, channel)
+        with self._lock:
+            self._subscriptions.setdefault(channel, []).append(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.channel, None)
+
+
+class RedisSubscription:
+    """
+    Subscription to a Redis pub/sub channel.
+    """
+    def __init__(self, client, pubsub):
+        self.client = client
+        self.pubsub = pubsub
+
+    async def get(self, timeout):
+        """
+        Wait for the next message. Returns None if nothing arrives before the timeout.
+        """
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message is None:
+            return None
+        data = message["data"]
+        return data.decode("utf-8") if isinstance(data, bytes) else data
+
+    async def close(self):
+        await self.pubsub.unsubscribe()
+        await self.pubsub.aclose()
+        await self.client.aclose()
+
+
+class RedisBroker:
+    """
+    Broker backed by Redis pub/sub. Messages published by any web or Celery
+    process reach the subscribers connected to any ASGI process.
+    """
+    def __init__(self, url):
+        self.url = url
+        self._client = redis.Redis.from_url(url)
+
+    def publish(self, channel, message):
+        self._client.publish(channel, message)
+
+    async def subscribe(self, channel):
+        client = aioredis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(channel)
+        return RedisSubscription(client, pubsub)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """
+    Return the broker configured in NOTIFICATIONS_PUSH_BACKEND ("redis" or "memory").
+    """
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                if settings.NOTIFICATIONS_PUSH_BACKEND == "memory":
+                    _broker = InMemoryBroker()
+                else:
+                    _broker = RedisBroker(settings.NOTIFICATIONS_PUSH_REDIS_URL)
+    return _broker
+
+
+def publish(channel, message):
+    """
+    Publish a message without ever breaking the caller: a push is best effort,
+    clients can always recover the state from the REST endpoints.
+    """
+    try:
+        get_broker().publish(channel, message)
+    except Exception:
+        logger.warning("Could not publish push message on %s", channel, exc_info=True)
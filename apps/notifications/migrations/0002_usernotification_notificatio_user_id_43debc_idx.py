@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usernotification',
+            index=models.Index(fields=['user', 'read'], name='notificatio_user_id_43debc_idx'),
+        ),
+    ]
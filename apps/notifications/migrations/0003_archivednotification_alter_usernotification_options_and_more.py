@@ -0,0 +1,75 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:01
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_created_at(apps, schema_editor):
+    """
+    Copy the creation date of the notification to the existing user notifications.
+    """
+    Notification = apps.get_model('notifications', 'Notification')
+    UserNotification = apps.get_model('notifications', 'UserNotification')
+    UserNotification.objects.update(
+        created_at=Subquery(
+            Notification.objects.filter(pk=OuterRef('notification_id')).values('created_at')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_usernotification_notificatio_user_id_43debc_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('description', models.TextField()),
+                ('type', models.CharField(choices=[('REPORT_ALERT', 'Report Alert')], max_length=50)),
+                ('created_at', models.DateTimeField()),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archived Notification',
+                'verbose_name_plural': 'Archived Notifications',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='usernotification',
+            options={'ordering': ['-created_at'], 'verbose_name': 'User Notification', 'verbose_name_plural': 'User Notifications'},
+        ),
+        migrations.AddField(
+            model_name='usernotification',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_created_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='usernotification',
+            index=models.Index(fields=['user', '-created_at'], name='notificatio_user_id_776dd3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usernotification',
+            index=models.Index(condition=models.Q(('read', True)), fields=['read_at'], name='usernotif_read_at_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivednotification',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_notifications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='archivednotification',
+            index=models.Index(fields=['user', '-created_at'], name='notificatio_user_id_0b7536_idx'),
+        ),
+    ]
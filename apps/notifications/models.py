@@ -39,12 +39,43 @@ class UserNotification(models.Model):
     )
     read = models.BooleanField(default=False)
     read_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         unique_together = ('user', 'notification')
         verbose_name = 'User Notification'
         verbose_name_plural = 'User Notifications'
-        ordering = ['-notification__created_at']
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'read']),
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['read_at'], condition=models.Q(read=True), name='usernotif_read_at_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.user.username} - {self.notification.type} - {'Read' if self.read else 'Unread'}"
\ No newline at end of file
+        return f"{self.user.username} - {self.notification.type} - {'Read' if self.read else 'Unread'}"
+
+
+class ArchivedNotification(models.Model):
+    """
+    Read notifications moved out of UserNotification by the retention task.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_notifications'
+    )
+    description = models.TextField()
+    type = models.CharField(max_length=50, choices=Notification.TYPE_CHOICES)
+    created_at = models.DateTimeField()
+    read_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Archived Notification'
+        verbose_name_plural = 'Archived Notifications'
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['user', '-created_at'])]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.type} (archived)"
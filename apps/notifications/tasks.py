@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedNotification, Notification, UserNotification
+
+
+@shared_task
+def prune_read_notifications(batch_size=None, max_batches=None):
+    """
+    Move the notifications read before the retention window to ArchivedNotification
+    and delete them, in bounded batches so a run never holds long locks.
+    """
+    batch_size = batch_size or settings.NOTIFICATIONS_RETENTION_BATCH_SIZE
+    max_batches = max_batches or settings.NOTIFICATIONS_RETENTION_MAX_BATCHES
+    cutoff = timezone.now() - timedelta(days=settings.NOTIFICATIONS_READ_RETENTION_DAYS)
+
+    archived = 0
+    for _ in range(max_batches):
+        with transaction.atomic():
+            batch = list(
+                UserNotification.objects
+                .filter(read=True, read_at__lt=cutoff)
+                .select_related('notification')
+                .select_for_update(skip_locked=True, of=('self',))
+                .order_by('read_at')[:batch_size]
+            )
+            if not batch:
+                break
+
+            ArchivedNotification.objects.bulk_create([
+                ArchivedNotification(
+                    user_id=un.user_id,
+                    description=un.notification.description,
+                    type=un.notification.type,
+                    created_at=un.created_at,
+                    read_at=un.read_at,
+                )
+                for un in batch
+            ])
+            UserNotification.objects.filter(id__in=[un.id for un in batch]).delete()
+        archived += len(batch)
+
+    # Notifications without recipients left are not reachable anymore
+    deleted = 0
+    for _ in range(max_batches):
+        ids = list(
+            Notification.objects
+            .filter(created_at__lt=cutoff, users__isnull=True)
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        Notification.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+
+    return {'archived': archived, 'deleted_notifications': deleted}
@@ -0,0 +1,41 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from apps.notifications.api.serializers import UserNotificationSerializer
+from apps.notifications.broker import publish, user_channel
+from apps.notifications.models import Notification, UserNotification
+
+
+def push_to_user(user_id, kind, data):
+    """
+    Push a message to the live stream of a user.
+    """
+    message = json.dumps({"type": kind, "data": data}, cls=DjangoJSONEncoder)
+    publish(user_channel(user_id), message)
+
+
+def push_user_notifications(user_notifications):
+    """
+    Push the given UserNotification rows to the live stream of their users.
+    """
+    for user_notification in user_notifications:
+        push_to_user(
+            user_notification.user_id,
+            "notification",
+            UserNotificationSerializer(user_notification).data
+        )
+
+
+def notify_users(users, description, type):
+    """
+    Create a notification for the given users and push it once the transaction commits.
+    """
+    notification = Notification.objects.create(description=description, type=type)
+    user_notifications = UserNotification.objects.bulk_create([
+        UserNotification(user=user, notification=notification, read=False)
+        for user in users
+    ])
+    transaction.on_commit(lambda: push_user_notifications(user_notifications))
+    return notification
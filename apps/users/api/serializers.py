@@ -1,11 +1,17 @@
+from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenBlacklistSerializer, TokenObtainPairSerializer, TokenRefreshSerializer
 
 from apps.events.api.serializers import EventSerializer
+from apps.users.permissions import get_user_groups, user_is_admin
+from apps.users.tokens import CachedRefreshToken
+from apps.media.api.fields import MediaImageField
+from apps.media.resolver import media_urls
+from apps.media.utils import rendition_urls
 
 User = get_user_model()
 
@@ -48,6 +54,8 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """
     Custom serializer to include additional claims in the JWT token.
     """
+    token_class = CachedRefreshToken
+
     @classmethod
     def get_token(cls, user):
         """
@@ -55,8 +63,10 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         """
         token = super().get_token(user)
 
-        token['is_admin'] = user.groups.filter(name='Administrator').exists()
-        token['groups'] = list(user.groups.values_list('name', flat=True))
+        # Read by StatelessJWTAuthentication, so requests do not load the user
+        token['username'] = user.username
+        token['is_admin'] = user_is_admin(user)
+        token['groups'] = sorted(get_user_groups(user))
         token['email_verified'] = user.email_verified
 
         return token
@@ -68,10 +78,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         data = super().validate(attrs)
         user = self.user
 
-        request = self.context.get('request')
-        if user.profile_photo:
-            profile_photo_url = request.build_absolute_uri(user.profile_photo.url) if request else user.profile_photo.url
-
+        profile_photo_url = media_urls(self.context.get('request')).url(user.profile_photo)
 
         data['user'] = {
             'id': user.id,
@@ -80,10 +87,10 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             'username': user.username,
             'email': user.email,
             'phone': user.phone,
-            'is_admin': user.groups.filter(name='Administrator').exists(),
-            'profile_photo': profile_photo_url if user.profile_photo else None,
+            'is_admin': user_is_admin(user),
+            'profile_photo': profile_photo_url,
             'email_verified': user.email_verified,
-            'groups': list(user.groups.values_list('name', flat=True)),
+            'groups': sorted(get_user_groups(user)),
         }
         return data
 
@@ -94,6 +101,20 @@ class VerifyEmailSerializer(serializers.Serializer):
     def validate(self, attrs):
         return attrs
 
+
+class LogoutSerializer(TokenBlacklistSerializer):
+    """
+    Blacklists the refresh token, also in the cache.
+    """
+    token_class = CachedRefreshToken
+
+
+class TokenRefreshCachedSerializer(TokenRefreshSerializer):
+    """
+    Rotates the refresh token, checking and updating the blacklist through the cache.
+    """
+    token_class = CachedRefreshToken
+
 class UserStatusSerializer(serializers.ModelSerializer):
     """
     Serializer para inhabilitar/habilitar usuarios.
@@ -141,14 +162,20 @@ class UserSerializer(serializers.ModelSerializer):
         validators=[UniqueValidator(queryset=User.objects.all(), message="Este número de teléfono ya está en uso.")]
     )
 
+    profile_photo = MediaImageField(read_only=True)
+    profile_photo_renditions = serializers.SerializerMethodField()
+
     class Meta:
         model = User
         fields = [
             "id", "username", "first_name", "last_name",
-            "date_of_birth", "phone", "profile_photo", "email",
+            "date_of_birth", "phone", "profile_photo", "profile_photo_renditions", "email",
             "email_verified",
         ]
-        read_only_fields = ["id", "email", "email_verified", "profile_photo"]
+        read_only_fields = ["id", "email", "email_verified", "profile_photo", "profile_photo_renditions"]
+
+    def get_profile_photo_renditions(self, obj) -> dict:
+        return rendition_urls(obj.profile_photo_renditions, self.context.get("request"))
 
     def validate_date_of_birth(self, dob):
         if dob and dob >= timezone.localdate():
@@ -183,8 +210,8 @@ def validate_image(file):
     """
     Validates an image file for size and format.
     """
-    if file.size > 2 * 1024 * 1024:
-        raise serializers.ValidationError("La imagen no puede superar 2 MB.")
+    if file.size > settings.MEDIA_AVATAR_MAX_SIZE:
+        raise serializers.ValidationError(f"La imagen no puede superar {settings.MEDIA_AVATAR_MAX_SIZE // (1024 * 1024)} MB.")
     ct = getattr(file, "content_type", "")
     if ct not in {"image/jpeg", "image/png", "image/webp"}:
         raise serializers.ValidationError("Formatos permitidos: JPG, PNG, WEBP.")
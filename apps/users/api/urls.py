@@ -2,7 +2,8 @@ from django.urls.conf import path
 from rest_framework.routers import DefaultRouter
 
 from apps.users.api.views import RegisterView, LoginView, VerifyEmailView, LogoutView, UserView, \
-    EmailChangeRequestOTPView, EmailChangeVerifyOTPView, ProfilePhotoView, UserStatusUpdateView, UserViewSet
+    EmailChangeRequestOTPView, EmailChangeVerifyOTPView, ProfilePhotoView, UserStatusUpdateView, UserViewSet, \
+    TokenRefreshCachedView
 
 router = DefaultRouter()
 router.register("", UserViewSet, basename="users")
@@ -11,6 +12,7 @@ urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
+    path('token/refresh/', TokenRefreshCachedView.as_view(), name='token-refresh'),
     path('verify-email/', VerifyEmailView.as_view() , name='verify-email'),
     path('disable/<int:pk>/', UserStatusUpdateView.as_view(), name='user-status-update'),
     path("", UserView.as_view(), name="user-detail"),
@@ -1,12 +1,11 @@
-import threading
-
-from django.core.files.storage import default_storage
+from django.db.models import Max, Q
 from django.db.models.aggregates import Count
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django.shortcuts import get_object_or_404
 from rest_framework.parsers import FormParser, MultiPartParser
 from django.utils import timezone
 
-from django.core.mail import send_mail
 from django.db import transaction
 from django.contrib.auth import get_user_model
 from rest_framework import status, viewsets
@@ -18,10 +17,18 @@ from rest_framework.decorators import action
 
 from apps.events.api.serializers import EventSerializer
 from apps.events.models import Event
+from apps.events.utils import categories_version, payload_etag
+from apps.mail.models import OutboundEmail
+from apps.mail.rendering import request_locale, templated_email
+from apps.mail.utils import enqueue_emails
+from apps.media.resolver import media_urls
+from apps.media.utils import rendition_urls, replace_image
 from apps.users.api.serializers import (
     RegisterSerializer,
     CustomTokenObtainPairSerializer,
     VerifyEmailSerializer,
+    LogoutSerializer,
+    TokenRefreshCachedSerializer,
     UserSerializer,
     EmailChangeRequestOTPSerializer,
     EmailChangeVerifyOTPSerializer,
@@ -30,7 +37,7 @@ from apps.users.api.serializers import (
 from apps.users.models import EmailChangeOTP
 from apps.users.utils import send_verification_email, generate_otp_code, hash_code, expiry, absolute_media_url
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenBlacklistView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenBlacklistView, TokenRefreshView
 from django.utils.encoding import force_str
 from django.utils.http import urlsafe_base64_decode
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
@@ -39,14 +46,6 @@ from apps.users.api.serializers import UserStatusSerializer
 
 User = get_user_model()
 
-def _send_verification_async(user):
-    """
-    Send a verification email to the user asynchronously.
-    :param user:  User instance
-    :return: None
-    """
-    threading.Thread(target=send_verification_email, args=(user,), daemon=True).start()
-
 class RegisterView(CreateAPIView):
     """
     API view to handle user registration.
@@ -54,12 +53,13 @@ class RegisterView(CreateAPIView):
     serializer_class = RegisterSerializer
     queryset = User.objects.all()
 
+    @transaction.atomic
     def perform_create(self, serializer):
         """
-        Save the new user and send a verification email asynchronously after the transaction is committed.
+        Save the new user and queue the verification email in the same transaction.
         """
         user = serializer.save()
-        transaction.on_commit(lambda : _send_verification_async(user))
+        send_verification_email(user, locale=request_locale(self.request))
 
 
 class UserView(RetrieveUpdateAPIView):
@@ -92,20 +92,21 @@ class EmailChangeRequestOTPView(GenericAPIView):
             return Response({"detail": "Espera un momento antes de solicitar otro código."}, status=429)
 
         code = generate_otp_code()
-        EmailChangeOTP.objects.create(
-            user=user,
-            new_email=new_email,
-            code_hash=hash_code(code),
-            expires_at=expiry(10),
-        )
+        with transaction.atomic():
+            EmailChangeOTP.objects.create(
+                user=user,
+                new_email=new_email,
+                code_hash=hash_code(code),
+                expires_at=expiry(10),
+            )
 
-        send_mail(
-            "Tu código para cambiar el correo - Eventify",
-            f"Tu código es: {code}\nVence en {10} minutos.",
-            None,
-            [new_email],
-            fail_silently=False,
-        )
+            enqueue_emails([templated_email(
+                "email_change_otp",
+                {"code": code, "minutes": 10},
+                new_email,
+                locale=request_locale(request),
+                priority=OutboundEmail.PRIORITY_CRITICAL,
+            )])
         return Response({"detail": "Código enviado al nuevo correo."}, status=200)
 
 
@@ -223,21 +224,12 @@ class ProfilePhotoView(GenericAPIView):
         ser = ProfilePhotoSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
         user = request.user
-
-        old = user.profile_photo
-        new_file = ser.validated_data["profile_photo"]
-
-        user.profile_photo = new_file
-        user.save(update_fields=["profile_photo"])
-
-        if old and old.name and old.name != user.profile_photo.name:
-            try:
-                default_storage.delete(old.name)
-            except Exception:
-                pass
+        replace_image(user, "profile_photo", ser.validated_data["profile_photo"], "avatar")
 
         return Response({
-            "profile_photo": absolute_media_url(request, user.profile_photo)
+            "profile_photo": absolute_media_url(request, user.profile_photo),
+            # Renditions are generated in the background; empty until they are ready
+            "profile_photo_renditions": rendition_urls(user.profile_photo_renditions, request),
         }, status=status.HTTP_200_OK)
 
     @transaction.atomic
@@ -245,15 +237,7 @@ class ProfilePhotoView(GenericAPIView):
         """
         Deletes the user's profile photo.
         """
-        user = request.user
-        old = user.profile_photo
-        user.profile_photo = None
-        user.save(update_fields=["profile_photo"])
-        if old and old.name:
-            try:
-                default_storage.delete(old.name)
-            except Exception:
-                pass
+        replace_image(request.user, "profile_photo", None, "avatar")
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -263,7 +247,17 @@ class LogoutView(TokenBlacklistView):
     
     POST /api/users/logout/
     """
-    pass
+    serializer_class = LogoutSerializer
+
+
+@extend_schema(tags=["auth"])
+class TokenRefreshCachedView(TokenRefreshView):
+    """
+    Issue a new access token (and a rotated refresh token) from a refresh token.
+
+    POST /api/users/token/refresh/
+    """
+    serializer_class = TokenRefreshCachedSerializer
 
 
 class UserStatusUpdateView(UpdateAPIView):
@@ -301,6 +295,28 @@ class UserStatusUpdateView(UpdateAPIView):
         return self.partial_update(request, *args, **kwargs)
 
 
+def profile_events_etag(request, pk=None, **kwargs):
+    """
+    ETag of a public profile: the user fields, and the newest updated_at and
+    the counts (total, started, finished) of the events created or enrolled in.
+    """
+    user = User.objects.filter(pk=pk, is_active=True).values_list(*UserSerializer.Meta.fields).first()
+    if user is None:
+        return None
+    now = timezone.now()
+    events = (
+        Event.objects
+        .filter(Q(id_creator_id=pk) | Q(student_events__student_id=pk), disabled_at__isnull=True)
+        .aggregate(
+            updated_at=Max("updated_at"),
+            total=Count("id", distinct=True),
+            started=Count("id", distinct=True, filter=Q(starts_at__lte=now)),
+            finished=Count("id", distinct=True, filter=Q(ends_at__lt=now)),
+        )
+    )
+    return payload_etag("profile", user, sorted(events.items()), categories_version(), media_urls(request).stamp)
+
+
 @extend_schema_view(
     retrieve=extend_schema(tags=["users"]),
     list=extend_schema(exclude=True),  # no haremos listado general
@@ -328,6 +344,7 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         responses=UserProfileEventsResponse,
     )
     @action(detail=True, methods=["get"], url_path="detail", permission_classes=[AllowAny])
+    @method_decorator(condition(etag_func=profile_events_etag))
     def profile_events(self, request, pk=None):
         """
         Retrieve user profile along with events they have created and enrolled in.
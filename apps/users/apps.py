@@ -1,5 +1,5 @@
 from django.apps import AppConfig
-from django.db.models.signals import post_migrate
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_delete
 
 def create_default_groups(sender, **kwargs):
     from django.contrib.auth.models import Group
@@ -11,4 +11,15 @@ class UsersConfig(AppConfig):
     name = 'apps.users'
 
     def ready(self):
-        post_migrate.connect(create_default_groups, sender=self)
\ No newline at end of file
+        from django.contrib.auth import get_user_model
+        from django.contrib.auth.models import Group
+        from apps.users.signals import invalidate_group_members, invalidate_user_groups, invalidate_user_roles, revoke_inactive_user
+        import apps.users.schema  # noqa: F401 (registers the OpenAPI auth extension)
+
+        post_migrate.connect(create_default_groups, sender=self)
+        m2m_changed.connect(invalidate_user_groups, sender=get_user_model().groups.through)
+        post_save.connect(invalidate_user_roles, sender=get_user_model())
+        post_delete.connect(invalidate_user_roles, sender=get_user_model())
+        post_save.connect(revoke_inactive_user, sender=get_user_model())
+        post_save.connect(invalidate_group_members, sender=Group)
+        pre_delete.connect(invalidate_group_members, sender=Group)
\ No newline at end of file
@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.utils.functional import SimpleLazyObject
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.users.permissions import user_is_superuser
+from apps.users.utils import is_token_revoked
+
+
+class TokenClaimsUser(SimpleLazyObject):
+    """
+    request.user backed by the claims of a validated access token. The identity
+    is read from the claims (roles come from apps.users.permissions); the User row is only loaded, once, when
+    the view touches anything else (model fields, FK assignment, queries).
+    is_active is always True: a disabled user is rejected through the
+    revocation deny-set, which is written when the deactivation is committed
+    (apps.users.signals.revoke_inactive_user); requests that arrive before
+    that still pass.
+    """
+
+    def __init__(self, token):
+        # The claim is a string (simplejwt serializes the id); compare as the model does
+        user_id = get_user_model()._meta.get_field(api_settings.USER_ID_FIELD).to_python(token[api_settings.USER_ID_CLAIM])
+
+        def load():
+            try:
+                return get_user_model().objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except get_user_model().DoesNotExist:
+                raise AuthenticationFailed("Usuario no encontrado.", code="user_not_found")
+
+        super().__init__(load)
+        self.__dict__["token"] = token
+        self.__dict__["_user_id"] = user_id
+
+    @property
+    def id(self):
+        return self._user_id
+
+    pk = id
+
+    @property
+    def username(self):
+        return self.token["username"] if "username" in self.token else self.__getattr__("username")
+
+    @property
+    def is_superuser(self):
+        # Not a claim: a refreshed token would keep a revoked flag
+        return user_is_superuser(self)
+
+    is_active = True
+    is_authenticated = True
+    is_anonymous = False
+
+    def __bool__(self):
+        return True
+
+    def __eq__(self, other):
+        return getattr(other, "pk", None) == self.pk and hasattr(other, "_meta")
+
+    def __hash__(self):
+        return hash(self.pk)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication without a user lookup per request: request.user is built
+    from the signed claims. Tokens of disabled users are rejected through the
+    revocation deny-set (see apps.users.utils.revoke_user_tokens).
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken("El token no contiene una identificación de usuario reconocible.")
+        if is_token_revoked(validated_token):
+            raise AuthenticationFailed("El token fue revocado.", code="token_revoked")
+        return TokenClaimsUser(validated_token)
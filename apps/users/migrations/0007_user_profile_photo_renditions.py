@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_alter_user_profile_photo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_photo_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Versiones redimensionadas de la foto (thumbnail, card, full)'),
+        ),
+    ]
@@ -21,6 +21,7 @@ class User(AbstractUser):
     email_verified = models.BooleanField(default=False)
     date_of_birth = models.DateField(null=True, blank=True)
     profile_photo = models.ImageField(upload_to=user_avatar_path, null=True, blank=True)
+    profile_photo_renditions = models.JSONField(default=dict, blank=True, editable=False, help_text="Versiones redimensionadas de la foto (thumbnail, card, full)")
     deleted_by = models.ForeignKey('self', null=True, blank=True, on_delete=models.SET_NULL, related_name='deleted_users')
     deleted_at = models.DateTimeField(null=True, blank=True)
 
@@ -1,9 +1,68 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
+ADMINISTRATOR_GROUP = "Administrator"
+
+
+def roles_cache_key(user_id):
+    return f"auth:roles:{user_id}"
+
+
+def get_user_roles(user):
+    """
+    Group names and superuser flag of the user. Resolved once per request
+    (memoized on the user object) and shared between processes through the
+    cache, which is invalidated when the user or its groups change (see
+    apps.users.signals).
+    """
+    if not user or not user.is_authenticated:
+        return frozenset(), False
+    # __dict__ of the object itself: reading it never loads a lazy request.user
+    roles = user.__dict__.get("_roles")
+    if roles is None:
+        key = roles_cache_key(user.pk)
+        cached = cache.get(key)
+        if cached is None:
+            rows = list(get_user_model().objects.filter(pk=user.pk).values_list("groups__name", "is_superuser"))
+            cached = ([name for name, _ in rows if name], any(superuser for _, superuser in rows))
+            cache.set(key, cached, settings.ROLES_CACHE_TIMEOUT)
+        roles = user.__dict__["_roles"] = (frozenset(cached[0]), cached[1])
+    return roles
+
+
+def get_user_groups(user):
+    """
+    Group names of the user (see get_user_roles).
+    """
+    return get_user_roles(user)[0]
+
+
+def user_is_superuser(user):
+    """
+    Current superuser flag of the user, never the one of an older token.
+    """
+    return get_user_roles(user)[1]
+
+
+def user_is_admin(user):
+    """
+    Whether the user belongs to the "Administrator" group.
+    """
+    return ADMINISTRATOR_GROUP in get_user_groups(user)
+
+
+def is_admin(request):
+    """
+    Whether the user of the request is an administrator.
+    """
+    return user_is_admin(request.user)
+
 
 class IsInAdministratorGroup(BasePermission):
     """
-    Allows access only to users in the "Administrator" group.
+    Allows access only to superusers and users in the "Administrator" group.
     """
     message = "Se requiere pertenecer al grupo Administrator."
 
@@ -11,6 +70,4 @@ class IsInAdministratorGroup(BasePermission):
         user = request.user
         if not user or not user.is_authenticated:
             return False
-        if user.is_superuser:
-            return True
-        return user.groups.filter(name="Administrator").exists()
\ No newline at end of file
+        return user_is_superuser(user) or is_admin(request)
@@ -0,0 +1,8 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class StatelessJWTScheme(SimpleJWTScheme):
+    """
+    OpenAPI security scheme of StatelessJWTAuthentication (same bearer JWT).
+    """
+    target_class = "apps.users.authentication.StatelessJWTAuthentication"
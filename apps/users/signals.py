@@ -0,0 +1,50 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.users.permissions import roles_cache_key
+from apps.users.utils import revoke_user_tokens
+
+
+def invalidate_user_groups(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Drop the cached groups of the users whose groups changed, from either side
+    of the relation (user.groups or group.user_set).
+    """
+    if action not in ("post_add", "post_remove", "pre_clear", "post_clear"):
+        return
+    if not reverse:
+        user_ids = [instance.pk]
+    elif action == "pre_clear":
+        user_ids = list(instance.user_set.values_list("pk", flat=True))
+    else:
+        user_ids = list(pk_set or ())
+    cache.delete_many([roles_cache_key(pk) for pk in user_ids])
+
+
+def invalidate_group_members(sender, instance, **kwargs):
+    """
+    Drop the cached groups of the members of a group that is renamed or deleted.
+    """
+    if instance.pk is None:
+        return
+    cache.delete_many([roles_cache_key(pk) for pk in instance.user_set.values_list("pk", flat=True)])
+
+
+def invalidate_user_roles(sender, instance, update_fields=None, **kwargs):
+    """
+    Drop the cached roles of a user that is saved or deleted, so a lost
+    superuser flag is not kept for as long as its tokens live.
+    """
+    if update_fields is not None and "is_superuser" not in update_fields:
+        return
+    cache.delete(roles_cache_key(instance.pk))
+
+
+def revoke_inactive_user(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Revoke the tokens of a user that is saved disabled, from the API, the admin
+    or the shell alike.
+    """
+    if created or instance.is_active or (update_fields is not None and "is_active" not in update_fields):
+        return
+    transaction.on_commit(lambda: revoke_user_tokens(instance.pk))
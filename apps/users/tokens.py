@@ -0,0 +1,22 @@
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.users.utils import is_blacklisted, mark_blacklisted
+
+
+class CachedRefreshToken(RefreshToken):
+    """
+    Refresh token whose blacklist lookups go through the cache. The database
+    stays the source of truth: blacklisting writes the row first and then the
+    cache entry, and a cache miss falls back to the indexed lookup.
+    """
+
+    def check_blacklist(self):
+        if is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError("El token está en la lista negra.")
+
+    def blacklist(self):
+        result = super().blacklist()
+        mark_blacklisted([self.payload[api_settings.JTI_CLAIM]])
+        return result
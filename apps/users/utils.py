@@ -4,27 +4,36 @@ from datetime import timedelta
 from django.utils import timezone
 from django.conf import settings
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
-from django.core.mail import send_mail
+from django.core.cache import cache
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from apps.mail.models import OutboundEmail
+from apps.mail.rendering import templated_email
+from apps.mail.utils import enqueue_emails
+from apps.media.resolver import media_urls
 
 token_generator = PasswordResetTokenGenerator()
 
-def send_verification_email(user):
+def send_verification_email(user, locale=None):
+    """
+    Queue the verification email in the outbox, within the current transaction.
+    """
     uid = urlsafe_base64_encode(force_bytes(user.pk))
     token = token_generator.make_token(user)
     verification_link = f"{settings.FRONTEND_URL}/verify-email?uid={uid}&token={token}"
 
-    subject = "Confirma tu correo - Eventify"
-    body = (
-        f"Hola {user.first_name or user.username},\n\n"
-        f"Gracias por registrarte en Eventify. Por favor, confirma tu correo electrónico haciendo clic en el siguiente enlace:\n\n"
-        f"{verification_link}\n\n"
-        "Si no te has registrado en Eventify, puedes ignorar este correo.\n\n"
-        "Saludos,\nEl equipo de Eventify"
+    email = templated_email(
+        "verify_email",
+        {"name": user.first_name or user.username, "verification_link": verification_link},
+        user.email,
+        locale=locale,
+        priority=OutboundEmail.PRIORITY_CRITICAL,
+        from_email=settings.DEFAULT_FROM_EMAIL,
     )
-
-    send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, [user.email], fail_silently=False)
+    enqueue_emails([email])
 
 def generate_otp_code():
     """
@@ -48,13 +57,63 @@ def absolute_media_url(request, f):
     """
     Return the absolute URL for a media file.
     """
-    if not f:
-        return None
-    url = getattr(f, "url", None)
-    if not url:
-        return None
-    # si ya es absoluto, devuélvelo tal cual
-    if url.startswith("http://") or url.startswith("https://"):
-        return url
-    # si es relativo (p. ej. /media/... o /...):
-    return request.build_absolute_uri(url)
\ No newline at end of file
+    return media_urls(request).url(f)
+
+
+def _revocation_key(user_id):
+    return f"auth:revoked:{user_id}"
+
+
+def revoke_user_tokens(user_id):
+    """
+    Revoke every token issued to the user so far. Access tokens issued before now
+    are rejected through a cached deny-set entry, kept as long as an access token
+    lives; refresh tokens are blacklisted.
+    """
+    lifetime = settings.SIMPLE_JWT["ACCESS_TOKEN_LIFETIME"]
+    cache.set(_revocation_key(user_id), int(timezone.now().timestamp()), int(lifetime.total_seconds()) + 60)
+
+    outstanding = list(
+        OutstandingToken.objects.filter(user_id=user_id, expires_at__gt=timezone.now(), blacklistedtoken__isnull=True)
+    )
+    BlacklistedToken.objects.bulk_create(
+        [BlacklistedToken(token=t) for t in outstanding], ignore_conflicts=True
+    )
+    mark_blacklisted([t.jti for t in outstanding])
+
+
+def is_token_revoked(token):
+    """
+    Whether the token was issued before the last revocation of its user.
+    """
+    revoked_at = cache.get(_revocation_key(token.get(api_settings.USER_ID_CLAIM)))
+    return revoked_at is not None and token.get("iat", 0) <= revoked_at
+
+
+def _blacklist_key(jti):
+    return f"auth:blacklisted:{jti}"
+
+
+def mark_blacklisted(jtis):
+    """
+    Record blacklisted refresh tokens in the cache, for as long as a refresh token lives.
+    """
+    lifetime = int(settings.SIMPLE_JWT["REFRESH_TOKEN_LIFETIME"].total_seconds())
+    cache.set_many({_blacklist_key(jti): True for jti in jtis}, lifetime)
+
+
+def is_blacklisted(jti):
+    """
+    Whether the refresh token is blacklisted, from the cache or, on a miss, from
+    the database. Negative answers are only cached for TOKEN_BLACKLIST_NEGATIVE_TTL
+    seconds, since a per-process cache would not see another process blacklisting it.
+    """
+    key = _blacklist_key(jti)
+    blacklisted = cache.get(key)
+    if blacklisted is None:
+        blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+        if blacklisted:
+            mark_blacklisted([jti])
+        else:
+            cache.set(key, False, settings.TOKEN_BLACKLIST_NEGATIVE_TTL)
+    return blacklisted
@@ -55,12 +55,14 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
     'apps.notifications',
+    'apps.mail',
+    'apps.media',
     'storages'
 ]
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.StatelessJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
@@ -89,6 +91,22 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
     "UPDATE_LAST_LOGIN": False
 }
+# Seconds the roles (groups, superuser flag) of a user stay cached (invalidated on changes anyway)
+ROLES_CACHE_TIMEOUT = 3600
+# Seconds a "not blacklisted" answer is cached (apps.users.utils.is_blacklisted)
+TOKEN_BLACKLIST_NEGATIVE_TTL = 30
+
+# Shared cache (token revocation deny-set...). Must be shared by every process in
+# production, so set CACHE_URL to a Redis URL; without it each process has its own.
+CACHE_URL = os.getenv('CACHE_URL')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_URL,
+    } if CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
@@ -106,7 +124,35 @@ CELERY_BEAT_SCHEDULE = {
     "scan-reminders-every-5-min": {
         "task": "apps.events.tasks.scan_and_schedule_reminders",
         "schedule": 300.0,
-    }
+    },
+    "schedule-post-event-reminders-every-15-min": {
+        "task": "apps.events.tasks.schedule_post_event_reminders",
+        "schedule": 900.0,
+    },
+    "drain-mail-outbox-every-minute": {
+        "task": "apps.mail.tasks.drain_outbox",
+        "schedule": 60.0,
+    },
+    "drain-critical-mail-outbox-every-minute": {
+        "task": "apps.mail.tasks.drain_critical_outbox",
+        "schedule": 60.0,
+    },
+    "prune-mail-outbox-daily": {
+        "task": "apps.mail.tasks.prune_outbox",
+        "schedule": crontab(hour=3, minute=30),
+    },
+    "prune-expired-tokens-daily": {
+        "task": "apps.users.tasks.prune_expired_tokens",
+        "schedule": crontab(hour=4, minute=0),
+    },
+    "sweep-orphaned-media-daily": {
+        "task": "apps.media.tasks.sweep_orphaned_media",
+        "schedule": crontab(hour=4, minute=30),
+    },
+    "prune-read-notifications-daily": {
+        "task": "apps.notifications.tasks.prune_read_notifications",
+        "schedule": crontab(hour=3, minute=0),
+    },
 }
 
 ROOT_URLCONF = 'eventify.urls'
@@ -224,10 +270,107 @@ EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "no-reply@eventify.local")
 SERVER_EMAIL = os.getenv("SERVER_EMAIL", DEFAULT_FROM_EMAIL)
 
+# Outbox (apps.mail): every email is stored first and sent by the drain_outbox task
+MAIL_OUTBOX_BATCH_SIZE = int(os.getenv("MAIL_OUTBOX_BATCH_SIZE", "100"))
+MAIL_OUTBOX_MAX_ATTEMPTS = 5
+MAIL_OUTBOX_BACKOFF_SECONDS = 60
+MAIL_OUTBOX_RETENTION_DAYS = 7
+MAIL_OUTBOX_FAILED_RETENTION_DAYS = 30
+# Locales with mail templates (apps/mail/templates/mail/<locale>/)
+MAIL_DEFAULT_LOCALE = "es"
+MAIL_LOCALES = ("es", "en")
+# Threads draining the outbox in-process when CELERY_TASK_ALWAYS_EAGER is on
+MAIL_LOCAL_DRAIN_WORKERS = int(os.getenv("MAIL_LOCAL_DRAIN_WORKERS", "2"))
+
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 CELERY_TIMEZONE = 'America/Bogota'
 CELERY_TASK_ALWAYS_EAGER = os.getenv('CELERY_TASK_ALWAYS_EAGER', 'False') == 'True'
 
+# Queues. Each one is consumed by its own worker (see docker-compose.yml), so a
+# reminder burst never delays verification or OTP mail.
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_QUEUES = {
+    'default': {},
+    'reminders': {},
+    'mail-critical': {},
+    'analytics': {},
+    'maintenance': {},
+    'media': {},
+}
+CELERY_TASK_ROUTES = {
+    'apps.mail.tasks.drain_critical_outbox': {'queue': 'mail-critical'},
+    'apps.mail.tasks.drain_outbox': {'queue': 'reminders'},
+    'apps.mail.tasks.prune_outbox': {'queue': 'maintenance'},
+    'apps.events.tasks.*': {'queue': 'reminders'},
+    'apps.notifications.tasks.*': {'queue': 'maintenance'},
+    'apps.users.tasks.*': {'queue': 'maintenance'},
+    'apps.media.tasks.sweep_orphaned_media': {'queue': 'maintenance'},
+    'apps.media.tasks.*': {'queue': 'media'},
+    'apps.analytics.tasks.*': {'queue': 'analytics'},
+}
+# Priorities inside a queue (Redis: 0 is the highest, 9 the lowest)
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'priority_steps': list(range(10)),
+    'sep': ':',
+    'queue_order_strategy': 'priority',
+}
+# Workers reserve one task at a time, so priorities are honoured and a long batch
+# does not hold other tasks hostage in the prefetch buffer.
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_ACKS_LATE = True
+# Per-worker rate limits of the bulk tasks
+CELERY_TASK_ANNOTATIONS = {
+    'apps.events.tasks.send_due_reminders': {'rate_limit': os.getenv('REMINDERS_RATE_LIMIT', '30/m')},
+    'apps.mail.tasks.drain_outbox': {'rate_limit': os.getenv('MAIL_OUTBOX_RATE_LIMIT', '60/m')},
+    'apps.events.tasks.sync_reminders': {'rate_limit': '120/m'},
+}
+
+# Timezone of the date and time fields of the events created without one
+EVENTS_DEFAULT_TIMEZONE = os.getenv('EVENTS_DEFAULT_TIMEZONE', 'America/Bogota')
+# Lifetime of the shared response cache of anonymous event listings (seconds); writes invalidate it earlier
+EVENTS_LIST_CACHE_TIMEOUT = int(os.getenv('EVENTS_LIST_CACHE_TIMEOUT', '60'))
+
+# Maximum number of reminders sent by a single batch task over one SMTP connection
+REMINDERS_BATCH_SIZE = int(os.getenv('REMINDERS_BATCH_SIZE', '200'))
+
+# Live notifications (SSE served by the ASGI app). "memory" only works inside a single process.
+NOTIFICATIONS_PUSH_BACKEND = os.getenv('NOTIFICATIONS_PUSH_BACKEND', 'redis')
+NOTIFICATIONS_PUSH_REDIS_URL = os.getenv('NOTIFICATIONS_PUSH_REDIS_URL', CELERY_BROKER_URL)
+NOTIFICATIONS_PUSH_HEARTBEAT = int(os.getenv('NOTIFICATIONS_PUSH_HEARTBEAT', '15'))
+
+# Read notifications older than this are moved to ArchivedNotification
+NOTIFICATIONS_READ_RETENTION_DAYS = int(os.getenv('NOTIFICATIONS_READ_RETENTION_DAYS', '90'))
+NOTIFICATIONS_RETENTION_BATCH_SIZE = 1000
+NOTIFICATIONS_RETENTION_MAX_BATCHES = 50
+
+# Renditions generated for uploaded images (apps.media): name -> (width, height, crop).
+# Without crop the image is only scaled down to fit the box.
+MEDIA_RENDITIONS = {
+    "avatar": {
+        "thumbnail": (96, 96, True),
+        "card": (256, 256, True),
+        "full": (1024, 1024, False),
+    },
+    "cover": {
+        "thumbnail": (320, 180, True),
+        "card": (800, 450, True),
+        "full": (1920, 1080, False),
+    },
+}
+# Largest profile photo and event cover accepted (bytes)
+MEDIA_AVATAR_MAX_SIZE = 2 * 1024 * 1024
+MEDIA_COVER_MAX_SIZE = 8 * 1024 * 1024
+# Largest image decoded to generate renditions (pixels, about 8000x5000); bigger ones are rejected
+MEDIA_MAX_IMAGE_PIXELS = 40_000_000
+# Direct uploads (apps.media): lifetime of the presigned upload and of the token to finalize it (seconds)
+MEDIA_UPLOAD_EXPIRES = 15 * 60
+MEDIA_UPLOAD_TOKEN_MAX_AGE = 60 * 60
+# Unreferenced media younger than this is not swept (uploads and renditions in progress), in seconds
+MEDIA_ORPHAN_GRACE = 24 * 60 * 60
+# Signed media URLs kept in memory per process (only used when the storage signs URLs)
+MEDIA_SIGNED_URL_CACHE_SIZE = 4096
+
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 AWS_STORAGE_BUCKET_NAME = os.getenv("AWS_STORAGE_BUCKET_NAME")
@@ -30,6 +30,8 @@ urlpatterns = [
     path('api/', include('apps.events.api.urls')),
     path('api/', include('apps.analytics.api.urls')),
     path('api/', include('apps.notifications.api.urls')),
+    path('api/', include('apps.mail.api.urls')),
+    path('api/', include('apps.media.api.urls')),
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),